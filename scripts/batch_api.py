@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Batch API support for NL2SQL evaluation.
+
+Submits every prompt of a run as one provider batch job instead of one
+request per question. Batch jobs cost half as much and are scheduled by the
+provider, which suits long overnight ablation runs. Completions are mapped
+back to questions by custom_id and then scored like any other response.
+
+Supported: OpenAI Batch API and Anthropic Message Batches.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from llm_providers import AnthropicProvider, LLMProvider, LLMResponse, OpenAIProvider, build_prompt
+
+BATCH_POLL_INTERVAL = 30  # seconds between status checks
+TERMINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled', 'ended'}
+
+
+def _timestamp() -> str:
+    """UTC time to the second, with an explicit offset, for saved job files."""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _write_atomic(path: Path, chunks: Iterable[bytes]):
+    """
+    Write chunks to a temp file and swap it in with os.replace.
+
+    An interrupted save leaves the previous file intact instead of a
+    truncated one that find_job would fail to parse.
+    """
+    tmp_file = path.with_suffix('.json.tmp')
+    with open(tmp_file, 'wb', buffering=1 << 20) as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_file, path)
+
+
+class BatchJobManager:
+    """Persist batch job metadata and raw results so runs can be resumed."""
+
+    def __init__(self, provider: str, jobs_dir: Path):
+        self.provider = provider
+        self.jobs_dir = jobs_dir
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        # Fixed per provider, so resolved once rather than on every save/load.
+        # Anthropic calls its jobs message batches.
+        self._id_key = 'batch_id' if provider == 'anthropic' else 'job_id'
+        self._prefix = f"{provider}_"
+
+    def _get_job_id_key(self) -> str:
+        """Field name used for the job id in saved files."""
+        return self._id_key
+
+    def _get_info_filename(self, job_id: str) -> Path:
+        return self.jobs_dir / (self._prefix + job_id + "_info.json")
+
+    def _get_results_filename(self, job_id: str) -> Path:
+        return self.jobs_dir / (self._prefix + job_id + "_results.json")
+
+    def get_job_id(self, info: Dict) -> str:
+        """Get the job id from a saved job info dict."""
+        return info[self._get_job_id_key()]
+
+    def save_job_info(self, job_id: str, info: Dict):
+        """Save job metadata (status, input hash, submission time)."""
+        info[self._get_job_id_key()] = job_id
+        _write_atomic(self._get_info_filename(job_id), [orjson.dumps(info, option=orjson.OPT_INDENT_2)])
+
+    def find_job(self, input_hash: str) -> Optional[Dict]:
+        """
+        Find an unfinished job previously submitted with identical input.
+
+        Finished jobs are never reused: their successes are already in the
+        LLM cache, and their failures should be retried with a new job.
+        """
+        for info_file in sorted(self.jobs_dir.glob(f"{self.provider}_*_info.json")):
+            info = orjson.loads(info_file.read_bytes())
+            if (info.get('input_hash') == input_hash
+                    and info.get('status') not in TERMINAL_STATUSES
+                    and not self._get_results_filename(self.get_job_id(info)).exists()):
+                return info
+        return None
+
+    def save_results(self, results: List[Dict], job_id: str, model: str, submitted_at: str):
+        """
+        Save the raw per-request results downloaded from a finished job.
+
+        Results are encoded one at a time into a buffered file rather than
+        as one document, so the whole encoded output never sits in memory.
+        """
+        header = {
+            self._get_job_id_key(): job_id,
+            'model': model,
+            'submitted_at': submitted_at,
+            'num_results': len(results)
+        }
+        # Machine-read only, so compact; job info files stay indented for people
+        _write_atomic(self._get_results_filename(job_id), self._encode_results(header, results))
+
+    @staticmethod
+    def _encode_results(header: Dict, results: List[Dict]) -> Iterable[bytes]:
+        """Yield the results document piece by piece, one result at a time."""
+        yield orjson.dumps(header)[:-1] + b',"results":['
+        for i, result in enumerate(results):
+            if i:
+                yield b','
+            yield orjson.dumps(result)
+        yield b']}'
+
+
+def batch_provider_key(provider: LLMProvider) -> str:
+    """Short provider name used to label saved batch jobs."""
+    return provider.name.split('/')[0]
+
+
+def run_batch(
+    provider: LLMProvider,
+    items: List[Tuple[str, str, str]],
+    manager: BatchJobManager,
+    poll_interval: int = BATCH_POLL_INTERVAL,
+    verbose: bool = False,
+    reattach: bool = True
+) -> Dict[str, LLMResponse]:
+    """Generate SQL for many questions with one batch job of the provider's kind."""
+    if isinstance(provider, AnthropicProvider):
+        return run_anthropic_batch(provider, items, manager, poll_interval, verbose, reattach)
+    if isinstance(provider, OpenAIProvider):
+        return run_openai_batch(provider, items, manager, poll_interval, verbose, reattach)
+    raise ValueError(f"{provider.name} has no batch API")
+
+
+def run_openai_batch(
+    provider: OpenAIProvider,
+    items: List[Tuple[str, str, str]],
+    manager: BatchJobManager,
+    poll_interval: int = BATCH_POLL_INTERVAL,
+    verbose: bool = False,
+    reattach: bool = True
+) -> Dict[str, LLMResponse]:
+    """
+    Generate SQL for many questions with one OpenAI batch job.
+
+    Args:
+        provider: OpenAI provider whose client and model are used
+        items: (custom_id, schema, question) for each request
+        manager: Where job metadata and raw results are persisted
+        poll_interval: Seconds between status checks
+        verbose: Print job status while waiting
+        reattach: Resume an unfinished job with identical input instead of
+            submitting a new one
+
+    Returns:
+        Responses keyed by custom_id. Requests missing from the output
+        come back as error responses.
+    """
+    lines = []
+    for custom_id, schema, question in items:
+        lines.append(json.dumps({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': provider.model,
+                'messages': [{'role': 'user', 'content': build_prompt(schema, question)}],
+                'max_tokens': 1024
+            }
+        }))
+    payload = ('\n'.join(lines) + '\n').encode()
+    input_hash = hashlib.sha256(payload).hexdigest()
+
+    # Reattach to an identical job from an earlier, interrupted run
+    info = manager.find_job(input_hash) if reattach else None
+    if info is None:
+        batch_file = provider.client.files.create(file=('batch.jsonl', payload), purpose='batch')
+        batch = provider.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        info = {
+            'status': batch.status,
+            'input_hash': input_hash,
+            'input_file_id': batch_file.id,
+            'num_requests': len(items),
+            'submitted_at': _timestamp()
+        }
+        manager.save_job_info(batch.id, info)
+    job_id = manager.get_job_id(info)
+
+    if verbose:
+        print(f"Batch job {job_id}: {len(items)} requests")
+
+    while True:
+        batch = provider.client.batches.retrieve(job_id)
+        if batch.status != info['status']:
+            info['status'] = batch.status
+            manager.save_job_info(job_id, info)
+        if batch.status in TERMINAL_STATUSES:
+            break
+        if verbose:
+            counts = batch.request_counts
+            done = counts.completed + counts.failed if counts else 0
+            print(f"  {batch.status}: {done}/{len(items)} done")
+        time.sleep(poll_interval)
+
+    if batch.status != 'completed' or not batch.output_file_id:
+        raise RuntimeError(f"Batch job {job_id} finished with status {batch.status}")
+
+    content = provider.client.files.content(batch.output_file_id).text
+    raw_results = [json.loads(line) for line in content.splitlines() if line.strip()]
+    manager.save_results(raw_results, job_id, provider.model, info['submitted_at'])
+
+    responses = {}
+    for r in raw_results:
+        response = r.get('response') or {}
+        body = response.get('body') or {}
+        if r.get('error') or response.get('status_code') != 200:
+            responses[r['custom_id']] = LLMResponse(
+                sql="",
+                raw_response="",
+                model=provider.model,
+                latency_ms=0.0,
+                error=str(r.get('error') or body.get('error'))
+            )
+            continue
+
+        raw = body['choices'][0]['message']['content']
+        responses[r['custom_id']] = LLMResponse(
+            sql=provider._extract_sql(raw),
+            raw_response=raw,
+            model=provider.model,
+            latency_ms=0.0
+        )
+
+    _fill_missing(responses, items, provider.model, job_id)
+    return responses
+
+
+def run_anthropic_batch(
+    provider: AnthropicProvider,
+    items: List[Tuple[str, str, str]],
+    manager: BatchJobManager,
+    poll_interval: int = BATCH_POLL_INTERVAL,
+    verbose: bool = False,
+    reattach: bool = True
+) -> Dict[str, LLMResponse]:
+    """
+    Generate SQL for many questions with one Anthropic message batch.
+
+    Same contract as run_openai_batch. Requests keep the prompt-caching
+    content blocks used for single requests.
+    """
+    requests = [
+        {
+            'custom_id': custom_id,
+            'params': {
+                'model': provider.model,
+                'max_tokens': 1024,
+                'messages': [{'role': 'user', 'content': provider._build_content(schema, question)}]
+            }
+        }
+        for custom_id, schema, question in items
+    ]
+    input_hash = hashlib.sha256(json.dumps(requests, sort_keys=True).encode()).hexdigest()
+
+    # Reattach to an identical batch from an earlier, interrupted run
+    info = manager.find_job(input_hash) if reattach else None
+    if info is None:
+        batch = provider.client.messages.batches.create(requests=requests)
+        info = {
+            'status': batch.processing_status,
+            'input_hash': input_hash,
+            'num_requests': len(items),
+            'submitted_at': _timestamp()
+        }
+        manager.save_job_info(batch.id, info)
+    job_id = manager.get_job_id(info)
+
+    if verbose:
+        print(f"Message batch {job_id}: {len(items)} requests")
+
+    while True:
+        batch = provider.client.messages.batches.retrieve(job_id)
+        if batch.processing_status != info['status']:
+            info['status'] = batch.processing_status
+            manager.save_job_info(job_id, info)
+        if batch.processing_status == 'ended':
+            break
+        if verbose:
+            counts = batch.request_counts
+            done = counts.succeeded + counts.errored + counts.canceled + counts.expired
+            print(f"  {batch.processing_status}: {done}/{len(items)} done")
+        time.sleep(poll_interval)
+
+    entries = list(provider.client.messages.batches.results(job_id))
+    manager.save_results([entry.to_dict() for entry in entries], job_id, provider.model, info['submitted_at'])
+
+    responses = {}
+    for entry in entries:
+        result = entry.result
+        if result.type != 'succeeded':
+            error = getattr(result, 'error', None)
+            responses[entry.custom_id] = LLMResponse(
+                sql="",
+                raw_response="",
+                model=provider.model,
+                latency_ms=0.0,
+                error=str(error) if error is not None else f"Batch request {result.type}"
+            )
+            continue
+
+        raw = result.message.content[0].text
+        responses[entry.custom_id] = LLMResponse(
+            sql=provider._extract_sql(raw),
+            raw_response=raw,
+            model=provider.model,
+            latency_ms=0.0
+        )
+
+    _fill_missing(responses, items, provider.model, job_id)
+    return responses
+
+
+def _fill_missing(responses: Dict[str, LLMResponse], items: List[Tuple[str, str, str]],
+                  model: str, job_id: str):
+    """Add an error response for every request the job returned nothing for."""
+    for custom_id, _, _ in items:
+        if custom_id not in responses:
+            responses[custom_id] = LLMResponse(
+                sql="",
+                raw_response="",
+                model=model,
+                latency_ms=0.0,
+                error=f"Missing from batch job {job_id} output"
+            )
@@ -9,12 +9,24 @@ Based on the test-suite-sql-eval approach from Spider.
 """
 
 import sqlite3
+import atexit
 import itertools
-from collections import defaultdict
-from typing import List, Tuple, Any, Optional
+import os
+import pickle
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional
 from dataclasses import dataclass
 
 
+# ORDER BY in a gold query, with any whitespace between the keywords
+_ORDER_BY_RE = re.compile(r'\border\s+by\b', re.IGNORECASE)
+
+
 @dataclass
 class EvalResult:
     """Result of evaluating a single query pair."""
@@ -36,14 +48,41 @@ def multiset_eq(l1: List, l2: List) -> bool:
     if len(l1) != len(l2):
         return False
 
-    d = defaultdict(int)
-    for e in l1:
-        d[e] += 1
-    for e in l2:
-        d[e] -= 1
-        if d[e] < 0:
-            return False
-    return True
+    # Counter tallies in C, much faster than a Python-level counting loop
+    return Counter(l1) == Counter(l2)
+
+
+def _normalize_float(val: float) -> Any:
+    """Convert floats that are whole numbers to int for comparison."""
+    if val.is_integer():
+        return int(val)
+    return val
+
+
+def _normalize_str(val: str) -> Any:
+    """Convert strings holding numbers to numbers."""
+    # Text starting with a letter can't parse as a number (apart from
+    # "nan"/"inf"), so skip the two failing conversions and their exceptions
+    first = val[:1]
+    if not first or (first.isalpha() and first not in 'nNiI'):
+        return val
+    try:
+        # Try int first
+        return int(val)
+    except ValueError:
+        try:
+            return _normalize_float(float(val))
+        except ValueError:
+            return val
+
+
+# Normalizer per exact value type; SQLite only returns these types
+_NORMALIZERS = {
+    type(None): None,
+    int: None,
+    float: _normalize_float,
+    str: _normalize_str,
+}
 
 
 def normalize_value(val: Any) -> Any:
@@ -52,52 +91,68 @@ def normalize_value(val: Any) -> Any:
 
     Handles type coercion issues (e.g., int vs float, string numbers).
     """
-    if val is None:
-        return None
+    try:
+        normalizer = _NORMALIZERS[type(val)]
+    except KeyError:
+        # Other types, including subclasses of float/str
+        if isinstance(val, float):
+            return _normalize_float(val)
+        if isinstance(val, str):
+            return _normalize_str(val)
+        return val
+    return val if normalizer is None else normalizer(val)
 
-    # Convert floats that are whole numbers to int for comparison
-    if isinstance(val, float) and val.is_integer():
-        return int(val)
 
-    # Try to convert string numbers to numbers
-    if isinstance(val, str):
-        try:
-            # Try int first
-            return int(val)
-        except ValueError:
-            try:
-                f = float(val)
-                if f.is_integer():
-                    return int(f)
-                return f
-            except ValueError:
-                pass
+def normalize_row(row: Tuple) -> Tuple:
+    """Normalize all values in a row."""
+    return tuple(map(normalize_value, row))
 
-    return val
 
+# Column types whose values normalize to themselves
+_IDENTITY_TYPES = {int, type(None)}
 
-def normalize_row(row: Tuple) -> Tuple:
-    """Normalize all values in a row."""
-    return tuple(normalize_value(v) for v in row)
 
+def normalize_rows(rows: List[Tuple]) -> List[Tuple]:
+    """
+    Normalize a whole result set column by column.
 
-def quick_reject(result1: List[Tuple], result2: List[Tuple]) -> bool:
+    Each column's value types are checked once; columns holding only ints
+    and NULLs (the common case for ids and counts) are passed through
+    without a per-cell call.
+    """
+    if not rows or not rows[0]:
+        return [normalize_row(row) for row in rows]
+
+    columns = []
+    for col in zip(*rows):
+        if set(map(type, col)) <= _IDENTITY_TYPES:
+            columns.append(col)
+        else:
+            columns.append(tuple(map(normalize_value, col)))
+    return list(zip(*columns))
+
+
+def quick_reject(result1: List[Tuple], result2: List[Tuple], normalized: bool = False) -> bool:
     """
     Quick rejection test - if the sets of values per column don't overlap,
     results can't possibly match under any permutation.
+
+    Pass normalized=True when both results are already normalized.
     """
     if len(result1) == 0 or len(result2) == 0:
         return True
 
-    # Check if value sets are compatible
-    set1 = set(normalize_value(v) for row in result1 for v in row)
-    set2 = set(normalize_value(v) for row in result2 for v in row)
+    if not normalized:
+        result1 = [normalize_row(row) for row in result1]
+        result2 = [normalize_row(row) for row in result2]
 
-    # If there's no overlap at all, reject
-    if len(set1) > 0 and len(set2) > 0 and len(set1 & set2) == 0:
-        return False
+    # Check if value sets are compatible
+    set1 = set(itertools.chain.from_iterable(result1))
+    if not set1 or not result2[0]:
+        return True
 
-    return True
+    # If there's no overlap at all, reject; stops at the first shared value
+    return not set1.isdisjoint(itertools.chain.from_iterable(result2))
 
 
 def get_column_permutations(result1: List[Tuple], result2: List[Tuple]) -> List[Tuple[int, ...]]:
@@ -111,17 +166,17 @@ def get_column_permutations(result1: List[Tuple], result2: List[Tuple]) -> List[
 
     num_cols = len(result1[0])
 
-    # For each column in result1, find which columns in result2 have compatible values
-    candidates = []
-    for i in range(num_cols):
-        col1_values = set(normalize_value(row[i]) for row in result1)
-        compatible = []
-        for j in range(num_cols):
-            col2_values = set(normalize_value(row[j]) for row in result2)
-            # Column j is compatible if it has the same value set
-            if col1_values == col2_values:
-                compatible.append(j)
-        candidates.append(compatible)
+    # Value-set signature of every column, built once by transposing each result
+    col1_sigs = [frozenset(map(normalize_value, col)) for col in zip(*result1)]
+    col2_sigs = [frozenset(map(normalize_value, col)) for col in zip(*result2)]
+
+    # Group result2's columns by signature so matching is a dict lookup
+    cols_by_sig = defaultdict(list)
+    for j, sig in enumerate(col2_sigs):
+        cols_by_sig[sig].append(j)
+
+    # For each column in result1, the columns in result2 with the same value set
+    candidates = [cols_by_sig.get(sig, []) for sig in col1_sigs]
 
     # Generate permutations that use each column exactly once
     def generate_perms(idx, used, current):
@@ -146,7 +201,16 @@ def permute_row(row: Tuple, perm: Tuple[int, ...]) -> Tuple:
     return tuple(row[perm[i]] for i in range(len(perm)))
 
 
-def result_eq(result1: List[Tuple], result2: List[Tuple], order_matters: bool) -> bool:
+def permute_rows(rows: List[Tuple], perm: Tuple[int, ...]) -> List[Tuple]:
+    """Apply a column permutation to every row, using one C-level getter."""
+    if len(perm) <= 1:
+        return [tuple(row[i] for i in perm) for row in rows]
+    getter = itemgetter(*perm)
+    return [getter(row) for row in rows]
+
+
+def result_eq(result1: List[Tuple], result2: List[Tuple], order_matters: bool,
+              result1_normalized: bool = False) -> bool:
     """
     Compare two query result sets for equivalence.
 
@@ -154,6 +218,7 @@ def result_eq(result1: List[Tuple], result2: List[Tuple], order_matters: bool) -
         result1: First result set (typically gold/reference)
         result2: Second result set (typically predicted)
         order_matters: If True, row order must match (for ORDER BY queries)
+        result1_normalized: If True, result1 is already normalized (see normalized_gold)
 
     Returns:
         True if the results are equivalent under the given constraints.
@@ -176,11 +241,11 @@ def result_eq(result1: List[Tuple], result2: List[Tuple], order_matters: bool) -
     num_cols = len(result1[0])
 
     # Normalize values for comparison
-    result1_norm = [normalize_row(row) for row in result1]
-    result2_norm = [normalize_row(row) for row in result2]
+    result1_norm = result1 if result1_normalized else normalize_rows(result1)
+    result2_norm = normalize_rows(result2)
 
     # Quick rejection test
-    if not quick_reject(result1_norm, result2_norm):
+    if not quick_reject(result1_norm, result2_norm, normalized=True):
         return False
 
     # Single column case - no permutation needed
@@ -190,14 +255,25 @@ def result_eq(result1: List[Tuple], result2: List[Tuple], order_matters: bool) -
         else:
             return multiset_eq(result1_norm, result2_norm)
 
+    # Columns usually come back in the gold order, so try the identity
+    # before building candidate permutations
+    if order_matters:
+        if result1_norm == result2_norm:
+            return True
+    elif multiset_eq(result1_norm, result2_norm):
+        return True
+
     # Try column permutations
+    identity = tuple(range(num_cols))
     for perm in get_column_permutations(result1_norm, result2_norm):
+        if perm == identity:
+            continue  # Already tried
         if len(perm) != num_cols:
             continue
         if len(set(perm)) != num_cols:  # Must use each column exactly once
             continue
 
-        result2_perm = [permute_row(row, perm) for row in result2_norm]
+        result2_perm = permute_rows(result2_norm, perm)
 
         if order_matters:
             if result1_norm == result2_perm:
@@ -209,6 +285,59 @@ def result_eq(result1: List[Tuple], result2: List[Tuple], order_matters: bool) -
     return False
 
 
+# Statements a query may run on a pooled connection. Anything else (writes,
+# PRAGMA, ATTACH, temp tables) would change the connection's state for every
+# later query on that database, and a rollback can't undo most of it.
+_READ_ONLY_ACTIONS = frozenset({
+    sqlite3.SQLITE_READ, sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE,
+})
+
+
+def _read_only_authorizer(action, arg1, arg2, db_name, trigger):
+    return sqlite3.SQLITE_OK if action in _READ_ONLY_ACTIONS else sqlite3.SQLITE_DENY
+
+
+# Open connections keyed by database path, reused across queries
+_connections: Dict[str, Tuple[sqlite3.Connection, threading.Lock]] = {}
+_connections_lock = threading.Lock()
+
+
+def _sqlite_conn(db_path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+    """
+    Get the cached connection for a database, opening it on first use.
+
+    The returned lock serializes use of the connection across worker threads.
+    Databases are opened read-only and immutable: Spider databases never
+    change during a run, so SQLite can skip file locking and change checks,
+    and a predicted query can never modify them. The connection only
+    authorizes plain reads, so no query can change the state later queries
+    see.
+    """
+    entry = _connections.get(db_path)
+    if entry is None:
+        with _connections_lock:
+            entry = _connections.get(db_path)
+            if entry is None:
+                uri = Path(db_path).absolute().as_uri() + '?mode=ro&immutable=1'
+                conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                conn.set_authorizer(_read_only_authorizer)
+                entry = _connections[db_path] = (conn, threading.Lock())
+    return entry
+
+
+def close_connections():
+    """Close all cached database connections."""
+    with _connections_lock:
+        for conn, lock in _connections.values():
+            with lock:
+                conn.close()
+        _connections.clear()
+
+
+atexit.register(close_connections)
+
+
 def execute_query(db_path: str, sql: str) -> Tuple[Optional[List[Tuple]], Optional[str]]:
     """
     Execute a SQL query and return results or error.
@@ -218,16 +347,125 @@ def execute_query(db_path: str, sql: str) -> Tuple[Optional[List[Tuple]], Option
         (None, error_message) on failure
     """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute(sql)
-        results = cursor.fetchall()
-        conn.close()
+        conn, lock = _sqlite_conn(db_path)
+        with lock:
+            results = conn.execute(sql).fetchall()
         return results, None
     except Exception as e:
         return None, str(e)
 
 
+# Gold query results keyed by (db_path, gold_sql). A gold query's result is a
+# pure function of the database file, so it only needs to run once.
+_gold_cache: Dict[Tuple[str, str], List[Tuple]] = {}
+
+# (st_mtime_ns, st_size) of each database when its first gold result was
+# cached, so persisted results can be dropped once the file changes
+_gold_db_stamps: Dict[str, Tuple[int, int]] = {}
+
+
+def _db_stamp(db_path: str) -> Optional[Tuple[int, int]]:
+    """The database file's (st_mtime_ns, st_size), or None if it is gone."""
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def execute_gold_query(db_path: str, gold_sql: str) -> Tuple[Optional[List[Tuple]], Optional[str]]:
+    """
+    Execute a gold query, reusing the result of any earlier identical run.
+
+    Only successful executions are cached, so errors are always retried.
+    """
+    key = (db_path, gold_sql)
+    results = _gold_cache.get(key)
+    if results is not None:
+        return results, None
+
+    results, error = execute_query(db_path, gold_sql)
+    if error is None:
+        if db_path not in _gold_db_stamps:
+            _gold_db_stamps[db_path] = _db_stamp(db_path)
+        _gold_cache[key] = results
+    return results, error
+
+
+# Normalized gold rows, derived once from _gold_cache entries
+_gold_norm_cache: Dict[Tuple[str, str], List[Tuple]] = {}
+
+
+def normalized_gold(db_path: str, gold_sql: str, gold_results: List[Tuple]) -> List[Tuple]:
+    """Get the normalized form of a gold result, normalizing it only once."""
+    key = (db_path, gold_sql)
+    rows = _gold_norm_cache.get(key)
+    if rows is None:
+        rows = _gold_norm_cache[key] = normalize_rows(gold_results)
+    return rows
+
+
+def precompute_gold(pairs: List[Tuple[str, str]], max_workers: int = 16) -> int:
+    """
+    Execute all not-yet-cached gold queries in parallel, filling the gold cache.
+
+    Args:
+        pairs: (db_path, gold_sql) for each question
+        max_workers: Threads to use; queries on different databases run concurrently
+
+    Returns:
+        Number of gold queries executed. Databases that don't exist are skipped.
+    """
+    todo = {p for p in pairs if p not in _gold_cache and Path(p[0]).exists()}
+    if not todo:
+        return 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(lambda p: execute_gold_query(*p), todo))
+    return len(todo)
+
+
+def load_gold_cache(cache_file: Path) -> int:
+    """
+    Load persisted gold results into the in-memory cache. Returns entries loaded.
+
+    Results for a database whose file has changed (or disappeared) since
+    they were cached are dropped.
+    """
+    if not cache_file.exists():
+        return 0
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        stamps, results = cached['stamps'], cached['results']
+    except Exception:
+        return 0  # Unreadable, or from before stamps were recorded
+
+    current = {db_path: _db_stamp(db_path) for db_path in stamps}
+    fresh = {db_path for db_path, stamp in stamps.items()
+             if stamp is not None and current[db_path] == stamp}
+    loaded = 0
+    for key, rows in results.items():
+        if key[0] in fresh:
+            _gold_cache[key] = rows
+            _gold_db_stamps.setdefault(key[0], stamps[key[0]])
+            loaded += 1
+    return loaded
+
+
+def save_gold_cache(cache_file: Path):
+    """Persist the in-memory gold results cache, atomically."""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        'stamps': {db_path: _gold_db_stamps.get(db_path) for db_path, _ in _gold_cache},
+        'results': _gold_cache
+    }
+    # Swap in a complete file so an interrupted save never leaves a truncated cache
+    tmp_file = cache_file.with_suffix(cache_file.suffix + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, cache_file)
+
+
 def eval_exec_match(db_path: str, predicted_sql: str, gold_sql: str) -> EvalResult:
     """
     Evaluate if predicted SQL produces the same results as gold SQL.
@@ -252,7 +490,7 @@ def eval_exec_match(db_path: str, predicted_sql: str, gold_sql: str) -> EvalResu
         )
 
     # Execute gold query
-    gold_results, gold_error = execute_query(db_path, gold_sql)
+    gold_results, gold_error = execute_gold_query(db_path, gold_sql)
     if gold_error:
         return EvalResult(
             match=False,
@@ -263,10 +501,11 @@ def eval_exec_match(db_path: str, predicted_sql: str, gold_sql: str) -> EvalResu
         )
 
     # Determine if order matters (presence of ORDER BY in gold query)
-    order_matters = 'order by' in gold_sql.lower()
+    order_matters = _ORDER_BY_RE.search(gold_sql) is not None
 
-    # Compare results
-    match = result_eq(gold_results, pred_results, order_matters)
+    # Compare results; the gold side is normalized once and reused
+    gold_norm = normalized_gold(db_path, gold_sql, gold_results)
+    match = result_eq(gold_norm, pred_results, order_matters, result1_normalized=True)
 
     return EvalResult(
         match=match,
@@ -11,6 +11,7 @@ This script creates complete semantic layers with:
 """
 
 import json
+import re
 from pathlib import Path
 from collections import defaultdict
 
@@ -34,18 +35,24 @@ RESERVED_WORDS = {
 }
 
 
+# Patterns used when cleaning identifiers, compiled once
+_PARENS_RE = re.compile(r'\([^)]*\)')
+_NON_IDENT_RE = re.compile(r'[^a-zA-Z0-9_]')
+_UNDERSCORES_RE = re.compile('_+')
+_UPPER_RE = re.compile('([A-Z])')
+
+
 def clean_identifier(name):
     """Clean a name to be a valid identifier, removing special chars."""
-    import re
     # Remove parentheses and their contents, or replace with underscore
-    result = re.sub(r'\([^)]*\)', '', name)
+    result = _PARENS_RE.sub('', name)
     # Replace spaces and special chars with underscores
     result = result.replace(' ', '_').replace('-', '_').replace('.', '_')
     result = result.replace('/', '_').replace('\\', '_').replace("'", '')
     # Remove any remaining non-alphanumeric chars except underscore
-    result = re.sub(r'[^a-zA-Z0-9_]', '', result)
+    result = _NON_IDENT_RE.sub('', result)
     # Clean up multiple underscores
-    result = re.sub('_+', '_', result).strip('_')
+    result = _UNDERSCORES_RE.sub('_', result).strip('_')
     return result
 
 
@@ -72,13 +79,12 @@ def quote_if_reserved(name):
 
 def to_snake_case(name):
     """Convert column name to snake_case dimension name."""
-    import re
     # First clean the name of special chars
     result = clean_identifier(name)
     # Convert camelCase to snake_case
-    result = re.sub('([A-Z])', r'_\1', result).lower()
+    result = _UPPER_RE.sub(r'_\1', result).lower()
     # Clean up multiple underscores
-    result = re.sub('_+', '_', result).strip('_')
+    result = _UNDERSCORES_RE.sub('_', result).strip('_')
     # If the result is a reserved word, add suffix
     if result.lower() in RESERVED_WORDS:
         result = result + '_val'
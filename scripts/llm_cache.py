@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of LLM responses for NL2SQL evaluation.
+
+Responses are keyed by provider and exact prompt text, so reruns and
+ablations that send a byte-identical prompt skip the API call entirely.
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from llm_providers import LLMResponse
+
+
+class LLMCache:
+    """SQLite-backed exact-match cache of successful LLM responses."""
+
+    def __init__(self, cache_file: Path):
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(cache_file))
+        # WAL with synchronous=NORMAL: each put is a cheap append, not a full fsync
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, sql TEXT, raw_response TEXT, model TEXT, "
+            "latency_ms REAL, ts REAL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(provider_name: str, prompt: str) -> str:
+        """Build the cache key for a provider/prompt pair."""
+        return hashlib.sha256(f"{provider_name}|{prompt}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[LLMResponse]:
+        """Return the cached response for a key, or None on a miss."""
+        row = self.conn.execute(
+            "SELECT sql, raw_response, model, latency_ms FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        sql, raw_response, model, latency_ms = row
+        return LLMResponse(
+            sql=sql,
+            raw_response=raw_response,
+            model=model,
+            latency_ms=latency_ms,  # Latency of the original call
+            cached=True
+        )
+
+    def put(self, key: str, response: LLMResponse):
+        """Store a successful response. Errors are never cached."""
+        if response.error:
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, sql, raw_response, model, latency_ms, ts) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, response.sql, response.raw_response, response.model,
+             response.latency_ms, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
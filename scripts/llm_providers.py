@@ -7,15 +7,61 @@ Supports multiple providers with a unified interface.
 
 import os
 import json
+import re
 import time
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Prompt shared by all providers. The schema comes first and the question
+# last, so prompts for the same database share a long identical prefix.
+SQL_PROMPT_PREFIX = """Given the following database schema:
+
+{schema}
+
+Write a SQL query to answer this question: """
+
+SQL_PROMPT_SUFFIX = """
+
+Return only the SQL query, no explanation. Do not wrap in markdown code blocks."""
+
+# Retries for rate limits (429), transient 5xx and dropped connections.
+# The SDKs back off exponentially with jitter and honor Retry-After, so a
+# burst of concurrent requests slows down instead of losing questions.
+MAX_RETRIES = 6
+
+
+@lru_cache(maxsize=256)
+def _prompt_prefix(schema: str) -> str:
+    """Render the per-database part of the prompt once."""
+    return SQL_PROMPT_PREFIX.format(schema=schema)
+
+
+def build_prompt(schema: str, question: str) -> str:
+    """
+    Build the SQL generation prompt sent to every provider.
+
+    Everything before the question depends only on the schema and is
+    rendered once per database. Keeping the question strictly at the end
+    also lets provider-side prompt caching reuse the shared prefix.
+    """
+    return _prompt_prefix(schema) + question + SQL_PROMPT_SUFFIX
+
+
+# A markdown code fence opening (optionally tagged sql) or closing the response
+_FENCE_RE = re.compile(r'\A```(?:sql)?|```\Z')
+
+
+def extract_sql(response: str) -> str:
+    """Extract SQL from a response, removing a surrounding markdown code block."""
+    return _FENCE_RE.sub('', response.strip()).strip()
+
 
 @dataclass
 class LLMResponse:
@@ -25,26 +71,64 @@ class LLMResponse:
     model: str
     latency_ms: float
     error: Optional[str] = None
+    cached: bool = False
 
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
+    # Whether the provider has a batch API usable through batch_api.run_batch
+    supports_batch = False
+
     @abstractmethod
     def generate_sql(self, schema: str, question: str) -> LLMResponse:
         """Generate SQL from a natural language question."""
         pass
 
+    async def agenerate_sql(self, schema: str, question: str) -> LLMResponse:
+        """
+        Async variant of generate_sql.
+
+        Providers with a native async client override this. The default runs
+        the blocking call in a worker thread so it never stalls the event loop.
+        """
+        return await asyncio.to_thread(self.generate_sql, schema, question)
+
     @property
     @abstractmethod
     def name(self) -> str:
         """Provider/model name for reporting."""
         pass
 
+    def _make_response(self, raw: str, start: float) -> LLMResponse:
+        """Build the response for a completion whose request began at start."""
+        return LLMResponse(
+            sql=self._extract_sql(raw),
+            raw_response=raw,
+            model=self.model,
+            latency_ms=(time.time() - start) * 1000
+        )
+
+    def _make_error(self, e: Exception, start: float) -> LLMResponse:
+        """Build the error response for a request that began at start and failed."""
+        return LLMResponse(
+            sql="",
+            raw_response="",
+            model=self.model,
+            latency_ms=(time.time() - start) * 1000,
+            error=str(e)
+        )
+
+    def _extract_sql(self, response: str) -> str:
+        """Extract SQL from response, handling markdown code blocks."""
+        return extract_sql(response)
+
 
 class AnthropicProvider(LLMProvider):
     """Anthropic Claude provider."""
 
+    supports_batch = True
+
     def __init__(self, model: str = "claude-opus-4-5-20250101"):
         self.model = model
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -52,69 +136,56 @@ class AnthropicProvider(LLMProvider):
             raise ValueError("ANTHROPIC_API_KEY not set")
 
         import anthropic
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = anthropic.Anthropic(api_key=self.api_key, max_retries=MAX_RETRIES)
+        self.async_client = anthropic.AsyncAnthropic(api_key=self.api_key, max_retries=MAX_RETRIES)
 
     @property
     def name(self) -> str:
         return f"anthropic/{self.model}"
 
     def generate_sql(self, schema: str, question: str) -> LLMResponse:
-        prompt = self._build_prompt(schema, question)
-
         start = time.time()
         try:
             response = self.client.messages.create(
                 model=self.model,
                 max_tokens=1024,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": self._build_content(schema, question)}]
             )
-            latency_ms = (time.time() - start) * 1000
-
-            raw = response.content[0].text
-            sql = self._extract_sql(raw)
+            return self._make_response(response.content[0].text, start)
+        except Exception as e:
+            return self._make_error(e, start)
 
-            return LLMResponse(
-                sql=sql,
-                raw_response=raw,
+    async def agenerate_sql(self, schema: str, question: str) -> LLMResponse:
+        start = time.time()
+        try:
+            response = await self.async_client.messages.create(
                 model=self.model,
-                latency_ms=latency_ms
+                max_tokens=1024,
+                messages=[{"role": "user", "content": self._build_content(schema, question)}]
             )
+            return self._make_response(response.content[0].text, start)
         except Exception as e:
-            return LLMResponse(
-                sql="",
-                raw_response="",
-                model=self.model,
-                latency_ms=(time.time() - start) * 1000,
-                error=str(e)
-            )
+            return self._make_error(e, start)
 
     def _build_prompt(self, schema: str, question: str) -> str:
-        return f"""Given the following database schema:
+        return build_prompt(schema, question)
 
-{schema}
-
-Write a SQL query to answer this question: {question}
-
-Return only the SQL query, no explanation. Do not wrap in markdown code blocks."""
-
-    def _extract_sql(self, response: str) -> str:
-        """Extract SQL from response, handling markdown code blocks."""
-        text = response.strip()
-
-        # Remove markdown code blocks if present
-        if text.startswith("```sql"):
-            text = text[6:]
-        elif text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-
-        return text.strip()
+    def _build_content(self, schema: str, question: str) -> list:
+        """
+        Split the prompt into content blocks with a cache breakpoint after
+        the schema, so questions on the same database reuse the cached prefix.
+        """
+        return [
+            {"type": "text", "text": _prompt_prefix(schema), "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": question + SQL_PROMPT_SUFFIX}
+        ]
 
 
 class OpenAIProvider(LLMProvider):
     """OpenAI GPT provider."""
 
+    supports_batch = True
+
     def __init__(self, model: str = "gpt-5.2-codex"):
         self.model = model
         self.api_key = os.getenv("OPENAI_API_KEY")
@@ -122,7 +193,8 @@ class OpenAIProvider(LLMProvider):
             raise ValueError("OPENAI_API_KEY not set")
 
         import openai
-        self.client = openai.OpenAI(api_key=self.api_key)
+        self.client = openai.OpenAI(api_key=self.api_key, max_retries=MAX_RETRIES)
+        self.async_client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=MAX_RETRIES)
 
     @property
     def name(self) -> str:
@@ -138,44 +210,26 @@ class OpenAIProvider(LLMProvider):
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=1024
             )
-            latency_ms = (time.time() - start) * 1000
+            return self._make_response(response.choices[0].message.content, start)
+        except Exception as e:
+            return self._make_error(e, start)
 
-            raw = response.choices[0].message.content
-            sql = self._extract_sql(raw)
+    async def agenerate_sql(self, schema: str, question: str) -> LLMResponse:
+        prompt = self._build_prompt(schema, question)
 
-            return LLMResponse(
-                sql=sql,
-                raw_response=raw,
+        start = time.time()
+        try:
+            response = await self.async_client.chat.completions.create(
                 model=self.model,
-                latency_ms=latency_ms
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1024
             )
+            return self._make_response(response.choices[0].message.content, start)
         except Exception as e:
-            return LLMResponse(
-                sql="",
-                raw_response="",
-                model=self.model,
-                latency_ms=(time.time() - start) * 1000,
-                error=str(e)
-            )
+            return self._make_error(e, start)
 
     def _build_prompt(self, schema: str, question: str) -> str:
-        return f"""Given the following database schema:
-
-{schema}
-
-Write a SQL query to answer this question: {question}
-
-Return only the SQL query, no explanation. Do not wrap in markdown code blocks."""
-
-    def _extract_sql(self, response: str) -> str:
-        text = response.strip()
-        if text.startswith("```sql"):
-            text = text[6:]
-        elif text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        return text.strip()
+        return build_prompt(schema, question)
 
 
 class GoogleProvider(LLMProvider):
@@ -188,9 +242,23 @@ class GoogleProvider(LLMProvider):
             raise ValueError("GOOGLE_API_KEY not set")
 
         import google.generativeai as genai
+        from google.api_core import exceptions, retry, retry_async
         genai.configure(api_key=self.api_key)
         self.client = genai.GenerativeModel(self.model)
 
+        # The Gemini SDK doesn't retry on its own. api_core retries until a
+        # deadline rather than a count; 120s fits about MAX_RETRIES jittered
+        # backoffs from 1s doubling up to 60s.
+        transient = retry.if_exception_type(
+            exceptions.TooManyRequests,
+            exceptions.InternalServerError,
+            exceptions.ServiceUnavailable,
+            exceptions.DeadlineExceeded
+        )
+        backoff = dict(predicate=transient, initial=1.0, maximum=60.0, multiplier=2.0, timeout=120.0)
+        self.request_options = {'retry': retry.Retry(**backoff)}
+        self.async_request_options = {'retry': retry_async.AsyncRetry(**backoff)}
+
     @property
     def name(self) -> str:
         return f"google/{self.model}"
@@ -200,45 +268,25 @@ class GoogleProvider(LLMProvider):
 
         start = time.time()
         try:
-            response = self.client.generate_content(prompt)
-            latency_ms = (time.time() - start) * 1000
+            response = self.client.generate_content(prompt, request_options=self.request_options)
+            return self._make_response(response.text, start)
+        except Exception as e:
+            return self._make_error(e, start)
 
-            raw = response.text
-            sql = self._extract_sql(raw)
+    async def agenerate_sql(self, schema: str, question: str) -> LLMResponse:
+        prompt = self._build_prompt(schema, question)
 
-            return LLMResponse(
-                sql=sql,
-                raw_response=raw,
-                model=self.model,
-                latency_ms=latency_ms
+        start = time.time()
+        try:
+            response = await self.client.generate_content_async(
+                prompt, request_options=self.async_request_options
             )
+            return self._make_response(response.text, start)
         except Exception as e:
-            return LLMResponse(
-                sql="",
-                raw_response="",
-                model=self.model,
-                latency_ms=(time.time() - start) * 1000,
-                error=str(e)
-            )
+            return self._make_error(e, start)
 
     def _build_prompt(self, schema: str, question: str) -> str:
-        return f"""Given the following database schema:
-
-{schema}
-
-Write a SQL query to answer this question: {question}
-
-Return only the SQL query, no explanation. Do not wrap in markdown code blocks."""
-
-    def _extract_sql(self, response: str) -> str:
-        text = response.strip()
-        if text.startswith("```sql"):
-            text = text[6:]
-        elif text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        return text.strip()
+        return build_prompt(schema, question)
 
 
 class DeepSeekProvider(LLMProvider):
@@ -253,7 +301,13 @@ class DeepSeekProvider(LLMProvider):
         import openai
         self.client = openai.OpenAI(
             api_key=self.api_key,
-            base_url="https://api.deepseek.com"
+            base_url="https://api.deepseek.com",
+            max_retries=MAX_RETRIES
+        )
+        self.async_client = openai.AsyncOpenAI(
+            api_key=self.api_key,
+            base_url="https://api.deepseek.com",
+            max_retries=MAX_RETRIES
         )
 
     @property
@@ -270,44 +324,26 @@ class DeepSeekProvider(LLMProvider):
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=1024
             )
-            latency_ms = (time.time() - start) * 1000
+            return self._make_response(response.choices[0].message.content, start)
+        except Exception as e:
+            return self._make_error(e, start)
 
-            raw = response.choices[0].message.content
-            sql = self._extract_sql(raw)
+    async def agenerate_sql(self, schema: str, question: str) -> LLMResponse:
+        prompt = self._build_prompt(schema, question)
 
-            return LLMResponse(
-                sql=sql,
-                raw_response=raw,
+        start = time.time()
+        try:
+            response = await self.async_client.chat.completions.create(
                 model=self.model,
-                latency_ms=latency_ms
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1024
             )
+            return self._make_response(response.choices[0].message.content, start)
         except Exception as e:
-            return LLMResponse(
-                sql="",
-                raw_response="",
-                model=self.model,
-                latency_ms=(time.time() - start) * 1000,
-                error=str(e)
-            )
+            return self._make_error(e, start)
 
     def _build_prompt(self, schema: str, question: str) -> str:
-        return f"""Given the following database schema:
-
-{schema}
-
-Write a SQL query to answer this question: {question}
-
-Return only the SQL query, no explanation. Do not wrap in markdown code blocks."""
-
-    def _extract_sql(self, response: str) -> str:
-        text = response.strip()
-        if text.startswith("```sql"):
-            text = text[6:]
-        elif text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        return text.strip()
+        return build_prompt(schema, question)
 
 
 class MinimaxProvider(LLMProvider):
@@ -320,7 +356,21 @@ class MinimaxProvider(LLMProvider):
             raise ValueError("MINIMAX_API_KEY not set")
 
         import requests
-        self.requests = requests
+        # One session for the provider's lifetime so concurrent calls reuse
+        # pooled keep-alive connections instead of a new TLS handshake each
+        self.session = requests.Session()
+        from urllib3.util.retry import Retry
+        retry = Retry(
+            total=MAX_RETRIES,
+            backoff_factor=1,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=None  # The API is POST-only; retry it too
+        )
+        self.session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=32, max_retries=retry))
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
         self.base_url = "https://api.minimax.chat/v1/text/chatcompletion_v2"
 
     @property
@@ -332,63 +382,27 @@ class MinimaxProvider(LLMProvider):
 
         start = time.time()
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
             payload = {
                 "model": self.model,
                 "messages": [{"role": "user", "content": prompt}],
                 "max_tokens": 1024
             }
 
-            response = self.requests.post(
+            response = self.session.post(
                 self.base_url,
-                headers=headers,
                 json=payload,
                 timeout=60
             )
             response.raise_for_status()
 
-            latency_ms = (time.time() - start) * 1000
             data = response.json()
-
             raw = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            sql = self._extract_sql(raw)
-
-            return LLMResponse(
-                sql=sql,
-                raw_response=raw,
-                model=self.model,
-                latency_ms=latency_ms
-            )
+            return self._make_response(raw, start)
         except Exception as e:
-            return LLMResponse(
-                sql="",
-                raw_response="",
-                model=self.model,
-                latency_ms=(time.time() - start) * 1000,
-                error=str(e)
-            )
+            return self._make_error(e, start)
 
     def _build_prompt(self, schema: str, question: str) -> str:
-        return f"""Given the following database schema:
-
-{schema}
-
-Write a SQL query to answer this question: {question}
-
-Return only the SQL query, no explanation. Do not wrap in markdown code blocks."""
-
-    def _extract_sql(self, response: str) -> str:
-        text = response.strip()
-        if text.startswith("```sql"):
-            text = text[6:]
-        elif text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-        return text.strip()
+        return build_prompt(schema, question)
 
 
 # Registry of available providers
@@ -6,82 +6,116 @@ Runs evaluation on sampled hard+extra questions from Spider.
 """
 
 import argparse
-import json
+import asyncio
+import hashlib
+import multiprocessing
 import os
+import pickle
 import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from evaluation import eval_exec_match, EvalResult
-from llm_providers import get_provider, list_providers, LLMProvider, LLMResponse
+import orjson
+
+from batch_api import BatchJobManager, batch_provider_key, run_batch
+from evaluation import (
+    eval_exec_match, EvalResult, load_gold_cache, precompute_gold, save_gold_cache
+)
+from llm_cache import LLMCache
+from llm_providers import build_prompt, get_provider, list_providers, LLMProvider, LLMResponse
 
 SPIDER_DIR = Path('/workspace/spider_db/spider')
 EVALUATION_DIR = Path('/workspace/project/evaluation')
 RESULTS_DIR = EVALUATION_DIR / 'results'
+GOLD_CACHE_FILE = EVALUATION_DIR / 'gold_cache.pkl'
+LLM_CACHE_FILE = EVALUATION_DIR / 'llm_cache.sqlite'
+BATCH_JOBS_DIR = EVALUATION_DIR / 'batch_jobs'
+SCHEMAS_CACHE_FILE = EVALUATION_DIR / 'tables.pkl'
+
+DEFAULT_MAX_CONCURRENCY = 16
+LOG_FLUSH_EVERY = 10       # results between flushes of the JSONL log
+LOG_FLUSH_INTERVAL = 5.0   # max seconds between flushes of the JSONL log
 
 
 def load_questions(sample_file: Path) -> List[Dict]:
     """Load sampled questions from JSON file."""
-    with open(sample_file) as f:
-        data = json.load(f)
+    data = orjson.loads(sample_file.read_bytes())
     return data['questions']
 
 
 def load_schemas() -> Dict[str, Dict]:
-    """Load all database schemas from tables.json."""
-    with open(SPIDER_DIR / 'tables.json') as f:
-        tables = json.load(f)
+    """
+    Load all database schemas from tables.json.
+
+    The parsed schemas are cached in a pickle sidecar, used as long as it
+    is newer than tables.json.
+    """
+    tables_file = SPIDER_DIR / 'tables.json'
+    try:
+        if SCHEMAS_CACHE_FILE.stat().st_mtime > tables_file.stat().st_mtime:
+            with open(SCHEMAS_CACHE_FILE, 'rb') as f:
+                return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    tables = orjson.loads(tables_file.read_bytes())
 
     schemas = {}
     for db in tables:
         db_id = db['db_id']
         schemas[db_id] = db
+
+    try:
+        SCHEMAS_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(SCHEMAS_CACHE_FILE, 'wb') as f:
+            pickle.dump(schemas, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # Caching is best effort
     return schemas
 
 
 def format_schema(db_schema: Dict) -> str:
     """Format a database schema as a string for the LLM prompt."""
-    lines = []
     db_id = db_schema['db_id']
-    lines.append(f"Database: {db_id}")
-    lines.append("")
-
-    # Group columns by table
     table_names = db_schema['table_names_original']
     columns = db_schema['column_names_original']
     column_types = db_schema['column_types']
 
-    # Build table -> columns mapping
-    tables = {i: {'name': name, 'columns': []} for i, name in enumerate(table_names)}
+    # Pair every column with its type once (missing types default to text)
+    types = column_types + ['text'] * (len(columns) - len(column_types))
+
+    # Group columns by table, skipping the * column
+    table_columns = [[] for _ in table_names]
+    for (table_idx, col_name), col_type in zip(columns, types):
+        if table_idx >= 0:
+            table_columns[table_idx].append(f"  - {col_name} ({col_type})\n")
 
-    for col_idx, (table_idx, col_name) in enumerate(columns):
-        if table_idx >= 0:  # Skip the * column
-            col_type = column_types[col_idx] if col_idx < len(column_types) else 'text'
-            tables[table_idx]['columns'].append((col_name, col_type))
+    # Every piece ends in a newline; the final one is dropped on return
+    parts = [f"Database: {db_id}\n", "\n"]
 
     # Format each table
-    for table_idx in sorted(tables.keys()):
-        table = tables[table_idx]
-        lines.append(f"Table: {table['name']}")
-        for col_name, col_type in table['columns']:
-            lines.append(f"  - {col_name} ({col_type})")
-        lines.append("")
+    for table_name, col_lines in zip(table_names, table_columns):
+        parts.append(f"Table: {table_name}\n")
+        parts.extend(col_lines)
+        parts.append("\n")
 
     # Add primary keys
     if db_schema.get('primary_keys'):
-        lines.append("Primary Keys:")
+        parts.append("Primary Keys:\n")
         for pk_idx in db_schema['primary_keys']:
             if pk_idx < len(columns):
                 table_idx, col_name = columns[pk_idx]
                 if table_idx >= 0:
-                    table_name = table_names[table_idx]
-                    lines.append(f"  - {table_name}.{col_name}")
-        lines.append("")
+                    parts.append(f"  - {table_names[table_idx]}.{col_name}\n")
+        parts.append("\n")
 
     # Add foreign keys
     if db_schema.get('foreign_keys'):
-        lines.append("Foreign Keys:")
+        parts.append("Foreign Keys:\n")
         for fk in db_schema['foreign_keys']:
             if len(fk) == 2:
                 col1_idx, col2_idx = fk
@@ -89,24 +123,175 @@ def format_schema(db_schema: Dict) -> str:
                     t1_idx, c1_name = columns[col1_idx]
                     t2_idx, c2_name = columns[col2_idx]
                     if t1_idx >= 0 and t2_idx >= 0:
-                        t1_name = table_names[t1_idx]
-                        t2_name = table_names[t2_idx]
-                        lines.append(f"  - {t1_name}.{c1_name} -> {t2_name}.{c2_name}")
+                        parts.append(f"  - {table_names[t1_idx]}.{c1_name} -> "
+                                     f"{table_names[t2_idx]}.{c2_name}\n")
 
-    return "\n".join(lines)
+    return "".join(parts)[:-1]
 
 
-def run_evaluation(
+# Formatted schema per db_id, shared by every provider in the process.
+# Most databases back several questions, and providers run concurrently.
+_schema_strs: Dict[str, str] = {}
+
+
+def get_schema_str(schemas: Dict[str, Dict], db_id: str) -> Optional[str]:
+    """Get the prompt-formatted schema for a database, formatting it only once."""
+    schema_str = _schema_strs.get(db_id)
+    if schema_str is None:
+        db_schema = schemas.get(db_id)
+        if db_schema is None:
+            return None
+        schema_str = _schema_strs[db_id] = format_schema(db_schema)
+    return schema_str
+
+
+async def get_llm_response(
+    provider: LLMProvider,
+    schema_str: str,
+    question: str,
+    cache: Optional[LLMCache] = None
+) -> LLMResponse:
+    """
+    Generate SQL for a question, going through the response cache if given.
+
+    A cached response for a byte-identical prompt from the same provider is
+    reused instead of calling the LLM.
+    """
+    if cache is None:
+        return await provider.agenerate_sql(schema_str, question)
+
+    cache_key = LLMCache.make_key(provider.name, build_prompt(schema_str, question))
+    llm_response = cache.get(cache_key)
+    if llm_response is None:
+        llm_response = await provider.agenerate_sql(schema_str, question)
+        cache.put(cache_key, llm_response)
+    return llm_response
+
+
+# Optional process pool for scoring, set up by main() with --eval-processes.
+# When unset, scoring runs on the default thread pool.
+_eval_pool: Optional[ProcessPoolExecutor] = None
+
+
+def score_sql(db_path: str, predicted_sql: str, gold_sql: str) -> Tuple[bool, Optional[str]]:
+    """Score predicted SQL, returning only (match, error) so it is cheap to send between processes."""
+    eval_result = eval_exec_match(db_path=db_path, predicted_sql=predicted_sql, gold_sql=gold_sql)
+    return eval_result.match, eval_result.error
+
+
+async def evaluate_question(
+    provider: LLMProvider,
+    q: Dict,
+    schema_str: str,
+    cache: Optional[LLMCache] = None,
+    llm_response: Optional[LLMResponse] = None
+) -> Dict:
+    """
+    Generate SQL for a single question and score it against the gold query.
+
+    A response obtained elsewhere (e.g. from a batch job or a question with
+    an identical prompt) can be passed in to skip the LLM call.
+    """
+    q_id = q['id']
+    db_id = q['db_id']
+    question = q['question']
+    gold_sql = q['gold_sql']
+
+    if llm_response is None:
+        llm_response = await get_llm_response(provider, schema_str, question, cache)
+
+    if llm_response.error:
+        return {
+            'question_id': q_id,
+            'db_id': db_id,
+            'question': question,
+            'gold_sql': gold_sql,
+            'predicted_sql': '',
+            'match': False,
+            'error': f"LLM error: {llm_response.error}",
+            'latency_ms': llm_response.latency_ms,
+            'raw_response': llm_response.raw_response,
+            'cached': False
+        }
+
+    # Evaluate the generated SQL in a worker thread (or process) so slow
+    # queries don't stall other questions' LLM requests
+    if _eval_pool is not None:
+        match, error = await asyncio.get_running_loop().run_in_executor(
+            _eval_pool, score_sql, q['db_path'], llm_response.sql, gold_sql
+        )
+    else:
+        match, error = await asyncio.to_thread(score_sql, q['db_path'], llm_response.sql, gold_sql)
+
+    return {
+        'question_id': q_id,
+        'db_id': db_id,
+        'question': question,
+        'gold_sql': gold_sql,
+        'predicted_sql': llm_response.sql,
+        'match': match,
+        'error': error,
+        'latency_ms': llm_response.latency_ms,
+        'raw_response': llm_response.raw_response,
+        'cached': llm_response.cached
+    }
+
+
+async def fetch_batch_responses(
+    provider: LLMProvider,
+    pending: List,
+    cache: Optional[LLMCache] = None,
+    verbose: bool = False
+) -> Dict[int, LLMResponse]:
+    """
+    Get LLM responses for all pending questions through one batch job.
+
+    Cached responses are reused; only the misses are submitted. Without a
+    cache, a fresh job is always submitted rather than resuming an earlier one.
+    """
+    responses = {}
+    items = []
+    cache_keys = {}
+
+    for _, q, schema_str in pending:
+        if cache is not None:
+            cache_key = LLMCache.make_key(provider.name, build_prompt(schema_str, q['question']))
+            cached = cache.get(cache_key)
+            if cached is not None:
+                responses[q['id']] = cached
+                continue
+            cache_keys[q['id']] = cache_key
+        items.append((str(q['id']), schema_str, q['question']))
+
+    if items:
+        manager = BatchJobManager(batch_provider_key(provider), BATCH_JOBS_DIR)
+        batch_responses = await asyncio.to_thread(
+            run_batch, provider, items, manager, verbose=verbose, reattach=cache is not None
+        )
+        for custom_id, llm_response in batch_responses.items():
+            q_id = int(custom_id)
+            responses[q_id] = llm_response
+            if q_id in cache_keys:
+                cache.put(cache_keys[q_id], llm_response)
+
+    return responses
+
+
+async def run_evaluation_async(
     provider: LLMProvider,
     questions: List[Dict],
     schemas: Dict[str, Dict],
     output_file: Path,
     resume: bool = False,
     limit: Optional[int] = None,
-    verbose: bool = False
+    verbose: bool = False,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    cache: Optional[LLMCache] = None,
+    batch_api: bool = False,
+    pretty: bool = False
 ) -> Dict:
     """
-    Run evaluation for a single provider.
+    Run evaluation for a single provider, evaluating questions concurrently.
 
     Args:
         provider: LLM provider to use
@@ -116,103 +301,125 @@ def run_evaluation(
         resume: If True, skip already-evaluated questions
         limit: Max questions to evaluate (for testing)
         verbose: Print progress
+        max_concurrency: Max questions in flight at once
+        cache: Optional LLM response cache
+        batch_api: Generate all SQL with one provider batch job (if supported)
+        pretty: Indent the final results file
 
     Returns:
         Summary metrics
     """
-    # Load existing results if resuming
-    existing_results = {}
-    if resume and output_file.exists():
-        with open(output_file) as f:
-            data = json.load(f)
-            for r in data.get('results', []):
-                existing_results[r['question_id']] = r
+    # Load existing results if resuming. Otherwise drop the previous run's
+    # results and log, so an interrupted fresh run can't later be resumed
+    # from a mix of old and new results.
+    log_file = output_file.with_suffix('.jsonl')
+    existing_results = load_existing_results(output_file) if resume else {}
+    if not resume:
+        output_file.unlink(missing_ok=True)
+        log_file.unlink(missing_ok=True)
 
-    results = []
     correct = 0
     errors = 0
     total = 0
 
     questions_to_run = questions[:limit] if limit else questions
+    num_questions = len(questions_to_run)
+
+    # Results are stored by question position so the saved file keeps the
+    # sample order even though questions complete out of order.
+    slots: List[Optional[Dict]] = [None] * num_questions
+    pending = []
 
     for i, q in enumerate(questions_to_run):
         q_id = q['id']
+        db_id = q['db_id']
 
         # Skip if already evaluated
-        if q_id in existing_results:
-            results.append(existing_results[q_id])
-            if existing_results[q_id]['match']:
+        cached = existing_results.get(q_id)
+        if cached is not None:
+            slots[i] = cached
+            if cached['match']:
                 correct += 1
-            if existing_results[q_id].get('error'):
+            if cached.get('error'):
                 errors += 1
             total += 1
             if verbose:
-                print(f"[{i+1}/{len(questions_to_run)}] Skipped (cached): {q_id}")
+                print(f"[{i+1}/{num_questions}] Skipped (cached): {q_id}")
             continue
 
         # Get schema for this database
-        db_id = q['db_id']
-        if db_id not in schemas:
+        schema_str = get_schema_str(schemas, db_id)
+        if schema_str is None:
             print(f"Warning: Schema not found for {db_id}, skipping")
             continue
 
-        schema_str = format_schema(schemas[db_id])
-
-        # Generate SQL
-        if verbose:
-            print(f"[{i+1}/{len(questions_to_run)}] {db_id}: {q['question'][:50]}...")
-
-        llm_response = provider.generate_sql(schema_str, q['question'])
-
-        if llm_response.error:
-            result = {
-                'question_id': q_id,
-                'db_id': db_id,
-                'question': q['question'],
-                'gold_sql': q['gold_sql'],
-                'predicted_sql': '',
-                'match': False,
-                'error': f"LLM error: {llm_response.error}",
-                'latency_ms': llm_response.latency_ms,
-                'raw_response': llm_response.raw_response
-            }
-            errors += 1
-        else:
-            # Evaluate the generated SQL
-            eval_result = eval_exec_match(
-                db_path=q['db_path'],
-                predicted_sql=llm_response.sql,
-                gold_sql=q['gold_sql']
-            )
+        pending.append((i, q, schema_str))
 
-            result = {
-                'question_id': q_id,
-                'db_id': db_id,
-                'question': q['question'],
-                'gold_sql': q['gold_sql'],
-                'predicted_sql': llm_response.sql,
-                'match': eval_result.match,
-                'error': eval_result.error,
-                'latency_ms': llm_response.latency_ms,
-                'raw_response': llm_response.raw_response
-            }
-
-            if eval_result.match:
-                correct += 1
-            if eval_result.error:
-                errors += 1
+    # Questions with byte-identical prompts share a single LLM call
+    groups: Dict[str, List] = defaultdict(list)
+    for item in pending:
+        _, q, schema_str = item
+        prompt = build_prompt(schema_str, q['question'])
+        groups[hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()].append(item)
 
-        results.append(result)
-        total += 1
-
-        # Save incrementally
-        save_results(output_file, provider.name, results, correct, total, errors)
-
-        if verbose:
-            status = "PASS" if result['match'] else "FAIL"
-            print(f"  -> {status} ({llm_response.latency_ms:.0f}ms)")
-            if result.get('error'):
-                print(f"     Error: {result['error'][:100]}")
+    batch_responses: Dict[int, LLMResponse] = {}
+    if batch_api and groups:
+        if provider.supports_batch:
+            batch_responses = await fetch_batch_responses(
+                provider, [group[0] for group in groups.values()], cache, verbose
+            )
+        else:
+            print(f"Warning: {provider.name} has no batch API, using per-question requests")
+
+    sem = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(group: List):
+        _, q, schema_str = group[0]
+        llm_response = batch_responses.get(q['id'])
+        if llm_response is None:
+            # Only the LLM stage holds a slot; scoring runs after it is
+            # released, so the next question's request goes out meanwhile
+            async with sem:
+                llm_response = await get_llm_response(provider, schema_str, q['question'], cache)
+        return [
+            (i, await evaluate_question(provider, q, schema_str, llm_response=llm_response))
+            for i, q, schema_str in group
+        ]
+
+    # Start questions grouped by database so requests sharing a schema
+    # prefix reach the provider back to back and hit its prompt cache
+    ordered = sorted(groups.values(), key=lambda group: group[0][1]['db_id'])
+    tasks = [asyncio.create_task(bounded(group)) for group in ordered]
+
+    with ResultLog(log_file) as log:
+        try:
+            for coro in asyncio.as_completed(tasks):
+                for i, result in await coro:
+                    slots[i] = result
+                    total += 1
+                    if result['match']:
+                        correct += 1
+                    if result.get('error'):
+                        errors += 1
+
+                    # Save incrementally
+                    log.append(result)
+
+                    if verbose:
+                        status = "PASS" if result['match'] else "FAIL"
+                        print(f"[{i+1}/{num_questions}] {result['db_id']}: {result['question'][:50]}... "
+                              f"-> {status} ({result['latency_ms']:.0f}ms)")
+                        if result.get('error'):
+                            print(f"     Error: {result['error'][:100]}")
+        finally:
+            # If anything above raised, don't leave the other questions
+            # running unobserved; cancel them and collect their outcomes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = [r for r in slots if r is not None]
+    save_results(output_file, provider.name, results, correct, total, errors, pretty)
 
     return {
         'provider': provider.name,
@@ -223,9 +430,136 @@ def run_evaluation(
     }
 
 
+def run_evaluation(
+    provider: LLMProvider,
+    questions: List[Dict],
+    schemas: Dict[str, Dict],
+    output_file: Path,
+    resume: bool = False,
+    limit: Optional[int] = None,
+    verbose: bool = False,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    cache: Optional[LLMCache] = None,
+    batch_api: bool = False,
+    pretty: bool = False
+) -> Dict:
+    """Run evaluation for a single provider (blocking wrapper around run_evaluation_async)."""
+    return asyncio.run(run_evaluation_async(
+        provider=provider,
+        questions=questions,
+        schemas=schemas,
+        output_file=output_file,
+        resume=resume,
+        limit=limit,
+        verbose=verbose,
+        max_concurrency=max_concurrency,
+        cache=cache,
+        batch_api=batch_api,
+        pretty=pretty
+    ))
+
+
+def load_existing_results(output_file: Path) -> Dict[int, Dict]:
+    """
+    Load previously saved results keyed by question id.
+
+    Reads the per-question JSONL log when present, since it also holds
+    results from runs that were interrupted before the final save.
+    """
+    existing_results = {}
+
+    if output_file.exists():
+        data = orjson.loads(output_file.read_bytes())
+        for r in data.get('results', []):
+            existing_results[r['question_id']] = r
+
+    log_file = output_file.with_suffix('.jsonl')
+    if log_file.exists():
+        with open(log_file, 'rb') as f:
+            for line in f:
+                try:
+                    r = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # Truncated last line from an interrupted run
+                existing_results[r['question_id']] = r
+
+    return existing_results
+
+
+class ResultLog:
+    """
+    Append-only JSONL log of per-question results.
+
+    The file stays open for the whole run and is flushed (and fsynced)
+    every LOG_FLUSH_EVERY results or LOG_FLUSH_INTERVAL seconds, whichever
+    comes first, instead of being reopened for every result. Flushes run on
+    a background writer thread so a slow fsync never blocks the event loop.
+    """
+
+    def __init__(self, log_file: Path):
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.f = open(log_file, 'ab')
+        self._trim_partial_line()
+        self.writer = ThreadPoolExecutor(max_workers=1)
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+
+    def _trim_partial_line(self):
+        """
+        Cut off a partial last line left by a crash mid-write.
+
+        Otherwise the next record would be glued onto it and both would be
+        dropped as undecodable on the next resume.
+        """
+        end = self.f.tell()
+        with open(self.f.name, 'rb') as f:
+            pos = end
+            while pos > 0:
+                start = max(0, pos - (1 << 16))
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b'\n')
+                if newline >= 0:
+                    pos = start + newline + 1
+                    break
+                pos = start
+        if pos < end:
+            self.f.truncate(pos)
+
+    def append(self, result: Dict):
+        self.f.write(orjson.dumps(result) + b'\n')
+        self.unflushed += 1
+        if (self.unflushed >= LOG_FLUSH_EVERY
+                or time.monotonic() - self.last_flush >= LOG_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        self.writer.submit(self._sync)
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+
+    def _sync(self):
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.writer.submit(self._sync)
+        self.writer.shutdown(wait=True)
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 def save_results(output_file: Path, provider_name: str, results: List[Dict],
-                 correct: int, total: int, errors: int):
-    """Save results to JSON file."""
+                 correct: int, total: int, errors: int, pretty: bool = False):
+    """
+    Save the final results and summary metadata to a JSON file.
+
+    Written compactly unless pretty is set, which indents for reading by hand.
+    """
     output_file.parent.mkdir(parents=True, exist_ok=True)
 
     data = {
@@ -240,12 +574,20 @@ def save_results(output_file: Path, provider_name: str, results: List[Dict],
         'results': results
     }
 
-    with open(output_file, 'w') as f:
-        json.dump(data, f, indent=2)
+    option = orjson.OPT_INDENT_2 if pretty else 0
+
+    # Write to a temp file and swap it in, so an interrupted save never
+    # leaves a truncated results file behind
+    tmp_file = output_file.with_suffix('.json.tmp')
+    with open(tmp_file, 'wb') as f:
+        f.write(orjson.dumps(data, option=option))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, output_file)
 
 
-def print_summary(summaries: List[Dict]):
-    """Print summary table of results."""
+def print_summary(summaries: List[Dict], failed: Optional[List] = None):
+    """Print summary table of results, followed by any providers that failed."""
     print("\n" + "=" * 60)
     print("EVALUATION SUMMARY")
     print("=" * 60)
@@ -256,6 +598,12 @@ def print_summary(summaries: List[Dict]):
         acc_str = f"{s['accuracy']:.1%}"
         print(f"{s['provider']:<25} {acc_str:>10} {s['correct']:>10} {s['errors']:>10}")
 
+    if failed:
+        print("-" * 60)
+        print("Failed providers:")
+        for name, error in failed:
+            print(f"  - {name}: {error[:100]}")
+
     print("=" * 60)
 
 
@@ -276,6 +624,20 @@ def main():
                         help='Print detailed progress')
     parser.add_argument('--dry-run', action='store_true',
                         help='Dry run - check setup without calling APIs')
+    parser.add_argument('--max-concurrency', '--concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f'Max questions evaluated concurrently per provider '
+                             f'(default: {DEFAULT_MAX_CONCURRENCY})')
+    parser.add_argument('--eval-processes', type=int, default=0,
+                        help='Score predictions in this many worker processes '
+                             '(default: 0, score in threads)')
+    parser.add_argument('--disable-cache', '--no-cache', action='store_true',
+                        help='Always call the LLM instead of reusing cached responses')
+    parser.add_argument('--cache-path', type=Path, default=LLM_CACHE_FILE,
+                        help=f'LLM response cache file (default: {LLM_CACHE_FILE})')
+    parser.add_argument('--batch-api', action='store_true',
+                        help='Submit all prompts as one provider batch job (cheaper, slower)')
+    parser.add_argument('--pretty-final', action='store_true',
+                        help='Indent the final results JSON (compact by default)')
 
     args = parser.parse_args()
 
@@ -294,6 +656,12 @@ def main():
     schemas = load_schemas()
     print(f"Loaded {len(schemas)} schemas")
 
+    # Check each database file once, not once per question
+    db_ids_by_path = {q['db_path']: q['db_id'] for q in questions}
+    missing_dbs = sorted({db_id for path, db_id in db_ids_by_path.items() if not Path(path).exists()})
+    if missing_dbs:
+        print(f"Warning: Missing databases: {', '.join(missing_dbs)}")
+
     if args.dry_run:
         print("\n[DRY RUN] Setup verified. Would evaluate:")
         providers_to_run = args.providers or list_providers()
@@ -306,38 +674,85 @@ def main():
     # Determine which providers to run
     providers_to_run = args.providers or list_providers()
 
-    summaries = []
-    for provider_name in providers_to_run:
-        print(f"\n{'='*60}")
-        print(f"Evaluating: {provider_name}")
-        print(f"{'='*60}")
-
-        try:
-            provider = get_provider(provider_name)
-        except ValueError as e:
-            print(f"Error: {e}")
-            continue
-        except Exception as e:
-            print(f"Error initializing {provider_name}: {e}")
-            continue
+    num_cached = load_gold_cache(GOLD_CACHE_FILE)
+    if num_cached:
+        print(f"Loaded {num_cached} cached gold results")
+
+    cache = None if args.disable_cache else LLMCache(args.cache_path)
+
+    gold_pairs = [(q['db_path'], q['gold_sql']) for q in questions[:args.limit]]
+
+    # Result comparison is pure Python and holds the GIL; worker processes
+    # let it use every core. Spawned workers don't share this process's
+    # gold cache, so fill and persist it first; each worker then loads it
+    # and opens its own connections.
+    global _eval_pool
+    if args.eval_processes > 0:
+        precompute_gold(gold_pairs)
+        save_gold_cache(GOLD_CACHE_FILE)
+        _eval_pool = ProcessPoolExecutor(
+            max_workers=args.eval_processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=load_gold_cache,
+            initargs=(GOLD_CACHE_FILE,)
+        )
 
+    async def eval_one(provider_name: str) -> Dict:
+        provider = get_provider(provider_name)
         output_file = RESULTS_DIR / f"{provider_name.replace('/', '_')}.json"
 
-        summary = run_evaluation(
+        summary = await run_evaluation_async(
             provider=provider,
             questions=questions,
             schemas=schemas,
             output_file=output_file,
             resume=args.resume,
             limit=args.limit,
-            verbose=args.verbose
+            verbose=args.verbose,
+            max_concurrency=args.max_concurrency,
+            cache=cache,
+            batch_api=args.batch_api,
+            pretty=args.pretty_final
         )
-
-        summaries.append(summary)
         print(f"\n{provider_name}: {summary['accuracy']:.1%} ({summary['correct']}/{summary['total']})")
+        return summary
+
+    async def eval_all() -> List:
+        # In-process, run every gold query once, in parallel, while the first
+        # LLM calls are in flight. This also opens each database's pooled
+        # connection.
+        warmup = None
+        if _eval_pool is None:
+            warmup = asyncio.gather(asyncio.to_thread(precompute_gold, gold_pairs), return_exceptions=True)
+
+        # Providers use separate APIs and rate limits, so run them side by side
+        outcomes = await asyncio.gather(
+            *[eval_one(name) for name in providers_to_run], return_exceptions=True
+        )
+        if warmup is not None:
+            await warmup
+        return outcomes
+
+    print(f"\nEvaluating {len(providers_to_run)} providers: {', '.join(providers_to_run)}")
+    outcomes = asyncio.run(eval_all())
+
+    summaries = []
+    failed = []
+    for provider_name, outcome in zip(providers_to_run, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Error evaluating {provider_name}: {outcome}")
+            failed.append((provider_name, str(outcome)))
+        else:
+            summaries.append(outcome)
+
+    if _eval_pool is not None:
+        _eval_pool.shutdown()
+    save_gold_cache(GOLD_CACHE_FILE)
+    if cache is not None:
+        cache.close()
 
-    if summaries:
-        print_summary(summaries)
+    if summaries or failed:
+        print_summary(summaries, failed)
 
 
 if __name__ == '__main__':
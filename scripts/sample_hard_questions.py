@@ -12,6 +12,8 @@ from pathlib import Path
 from collections import Counter
 from datetime import datetime
 
+import orjson
+
 # Fixed seed for reproducibility
 RANDOM_SEED = 42
 SAMPLE_SIZE = 200  # Total questions (100 hard + 100 extra)
@@ -20,6 +22,18 @@ SPIDER_DIR = Path('/workspace/spider_db/spider')
 OUTPUT_DIR = Path('/workspace/project/evaluation')
 
 
+def check_nested(clause):
+    """Whether a parsed clause contains a nested SQL query (a dict) at any depth."""
+    stack = [clause]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            return True  # nested SQL
+        if isinstance(item, list):
+            stack.extend(item)
+    return False
+
+
 def get_difficulty(sql_struct):
     """
     Compute Spider difficulty based on SQL components.
@@ -50,15 +64,6 @@ def get_difficulty(sql_struct):
 
     # Check WHERE for nested queries
     where_clause = sql_struct.get('where', [])
-    def check_nested(clause):
-        if isinstance(clause, dict):
-            return True  # nested SQL
-        if isinstance(clause, list):
-            for item in clause:
-                if check_nested(item):
-                    return True
-        return False
-
     if check_nested(where_clause):
         has_subquery = True
 
@@ -87,22 +92,27 @@ def get_difficulty(sql_struct):
 
 
 def load_train_data():
-    """Load all training data from Spider."""
-    all_questions = []
+    """
+    Load all training data from Spider, tagged with source and difficulty.
 
-    # Load train_spider
-    with open(SPIDER_DIR / 'train_spider.json') as f:
-        train_spider = json.load(f)
-        for q in train_spider:
-            q['source'] = 'train_spider'
-        all_questions.extend(train_spider)
+    Only the fields the sample needs are kept, so each file's full parse
+    (including the bulky parsed 'sql' tree) is dropped before the next loads.
+    """
+    all_questions = []
 
-    # Load train_others
-    with open(SPIDER_DIR / 'train_others.json') as f:
-        train_others = json.load(f)
-        for q in train_others:
-            q['source'] = 'train_others'
-        all_questions.extend(train_others)
+    for source in ('train_spider', 'train_others'):
+        questions = orjson.loads((SPIDER_DIR / f'{source}.json').read_bytes())
+        all_questions.extend(
+            {
+                'db_id': q['db_id'],
+                'question': q['question'],
+                'query': q['query'],
+                'source': source,
+                'difficulty': get_difficulty(q['sql']),
+            }
+            for q in questions
+        )
+        del questions
 
     return all_questions
 
@@ -120,8 +130,9 @@ def main():
     print(f"Target sample size: {SAMPLE_SIZE} (100 hard + 100 extra)")
     print()
 
-    # Set random seed for reproducibility
-    random.seed(RANDOM_SEED)
+    # Dedicated generator: the sample depends only on RANDOM_SEED, not on
+    # anything else that touches the global random state
+    rng = random.Random(RANDOM_SEED)
 
     # Load training data
     print("Loading training data...")
@@ -132,9 +143,7 @@ def main():
     by_difficulty = {'easy': [], 'medium': [], 'hard': [], 'extra': []}
 
     for q in all_questions:
-        diff = get_difficulty(q['sql'])
-        q['difficulty'] = diff
-        by_difficulty[diff].append(q)
+        by_difficulty[q['difficulty']].append(q)
 
     print("\nDifficulty distribution in train:")
     for diff in ['easy', 'medium', 'hard', 'extra']:
@@ -154,27 +163,26 @@ def main():
     # Sample 100 of each
     print("\nSampling 100 hard and 100 extra questions...")
 
-    sampled_hard = random.sample(by_difficulty['hard'], 100)
-    sampled_extra = random.sample(by_difficulty['extra'], 100)
+    sampled_hard = rng.sample(by_difficulty['hard'], 100)
+    sampled_extra = rng.sample(by_difficulty['extra'], 100)
 
     # Combine and shuffle
     sampled = sampled_hard + sampled_extra
-    random.shuffle(sampled)
+    rng.shuffle(sampled)
 
     # Verify database files exist
     print("\nVerifying database files exist...")
-    missing_dbs = set()
-    for q in sampled:
-        db_path = get_db_path(q['db_id'])
-        if not db_path.exists():
-            missing_dbs.add(q['db_id'])
+    # One check of the .sqlite file per database, not per question
+    sampled_dbs = {q['db_id'] for q in sampled}
+    missing_dbs = {db_id for db_id in sampled_dbs if not get_db_path(db_id).exists()}
 
     if missing_dbs:
         print(f"WARNING: Missing databases: {missing_dbs}")
     else:
         print("All database files found!")
 
-    # Prepare output format
+    # Prepare output format; db paths are built once per database
+    db_paths = {db_id: str(get_db_path(db_id)) for db_id in sampled_dbs}
     output_questions = []
     for i, q in enumerate(sampled):
         output_questions.append({
@@ -184,7 +192,7 @@ def main():
             'gold_sql': q['query'],
             'difficulty': q['difficulty'],
             'source': q['source'],
-            'db_path': str(get_db_path(q['db_id']))
+            'db_path': db_paths[q['db_id']]
         })
 
     # Create output directory
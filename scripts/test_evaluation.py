@@ -14,19 +14,23 @@ Tests all edge cases for execution-based SQL comparison:
 
 import os
 import sys
-import json
+import re
 import sqlite3
 import tempfile
 import random
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
+import orjson
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
 from evaluation import (
     result_eq, multiset_eq, normalize_value, normalize_row,
-    eval_exec_match, EvalResult, execute_query
+    eval_exec_match, EvalResult, execute_query, execute_gold_query,
+    precompute_gold, close_connections, load_gold_cache, save_gold_cache
 )
 
 
@@ -60,23 +64,22 @@ class TestResults:
         return self.failed == 0
 
 
+# Test databases go on tmpfs where there is one. The evaluator opens
+# databases by path, so they can't be purely in-memory.
+TEST_DB_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
 def create_test_db(tables_sql: str, data_sql: str) -> str:
     """Create a temporary SQLite database for testing."""
-    fd, path = tempfile.mkstemp(suffix='.db')
+    fd, path = tempfile.mkstemp(suffix='.db', dir=TEST_DB_DIR)
     os.close(fd)
 
+    # One script, one transaction; the file is throwaway, so skip durability
     conn = sqlite3.connect(path)
-    cursor = conn.cursor()
-
-    for stmt in tables_sql.split(';'):
-        if stmt.strip():
-            cursor.execute(stmt)
-
-    for stmt in data_sql.split(';'):
-        if stmt.strip():
-            cursor.execute(stmt)
-
-    conn.commit()
+    conn.executescript(
+        "PRAGMA journal_mode=MEMORY; PRAGMA synchronous=OFF; BEGIN;\n"
+        f"{tables_sql};\n{data_sql};\nCOMMIT;"
+    )
     conn.close()
     return path
 
@@ -403,6 +406,18 @@ def test_sql_execution(results: TestResults):
             f"Got match={result.match}"
         )
 
+        # ORDER BY split across lines in the gold query still enforces order
+        result = eval_exec_match(
+            db_path,
+            "SELECT name FROM users ORDER BY age DESC",
+            "SELECT name FROM users ORDER\n    BY name"
+        )
+        results.record(
+            "SQL exec: multi-line ORDER BY detected",
+            not result.match,
+            f"Got match={result.match}"
+        )
+
         # Aggregate query
         result = eval_exec_match(
             db_path,
@@ -428,7 +443,63 @@ def test_sql_execution(results: TestResults):
         results.record("SQL exec: syntax error returns False", not result.match)
         results.record("SQL exec: syntax error has error message", result.error is not None)
 
+        # Writes from a predicted query must not leak into later queries
+        # on the reused connection
+        _, write_err = execute_query(db_path, "INSERT INTO users VALUES (4, 'Dan', 40)")
+        results.record("SQL exec: predicted writes are rejected", write_err is not None)
+        count, _ = execute_query(db_path, "SELECT COUNT(*) FROM users")
+        results.record(
+            "SQL exec: predicted writes don't persist",
+            count == [(3,)],
+            f"Got {count}"
+        )
+
+        # Neither can PRAGMAs or temp tables, which a rollback wouldn't undo
+        execute_query(db_path, "PRAGMA case_sensitive_like = ON")
+        like, _ = execute_query(db_path, "SELECT name FROM users WHERE name LIKE 'alice'")
+        results.record("SQL exec: predicted PRAGMA doesn't persist", like == [('Alice',)], f"Got {like}")
+        _, temp_err = execute_query(db_path, "CREATE TEMP TABLE users (id INTEGER)")
+        count, _ = execute_query(db_path, "SELECT COUNT(*) FROM users")
+        results.record(
+            "SQL exec: predicted temp tables don't shadow real ones",
+            temp_err is not None and count == [(3,)],
+            f"Got {count}"
+        )
+        cte, cte_err = execute_query(
+            db_path, "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 3) SELECT COUNT(*) FROM n"
+        )
+        results.record("SQL exec: recursive CTEs still run", cte == [(3,)], f"Got {cte} {cte_err}")
+
+        # Gold results are memoized per (db_path, gold_sql)
+        gold1, _ = execute_gold_query(db_path, "SELECT name FROM users")
+        gold2, _ = execute_gold_query(db_path, "SELECT name FROM users")
+        results.record("SQL exec: gold results reused", gold1 is gold2 and len(gold1) == 3)
+
+        # Precomputing only runs gold queries that aren't cached yet
+        executed = precompute_gold([
+            (db_path, "SELECT name FROM users"),
+            (db_path, "SELECT age FROM users"),
+            (db_path, "SELECT age FROM users"),
+        ])
+        results.record("SQL exec: precompute runs uncached gold once", executed == 1, f"Ran {executed}")
+
+        # Persisted gold results are dropped once their database file changes
+        cache_file = Path(db_path + '.gold.pkl')
+        try:
+            save_gold_cache(cache_file)
+            reloaded = load_gold_cache(cache_file)
+            os.utime(db_path, ns=(0, 0))
+            stale = load_gold_cache(cache_file)
+        finally:
+            cache_file.unlink(missing_ok=True)
+        results.record(
+            "SQL exec: gold cache skips changed databases",
+            reloaded >= 2 and stale == 0,
+            f"Reloaded {reloaded}, after change {stale}"
+        )
+
     finally:
+        close_connections()
         os.unlink(db_path)
 
 
@@ -436,6 +507,49 @@ def test_sql_execution(results: TestResults):
 # Test 9: 50/50 Validation with Real Spider Data
 # =============================================================================
 
+_LIMIT_RE = re.compile(r'LIMIT\s+\d+', re.IGNORECASE)
+
+
+def introduce_error(sql: str, db_path: str) -> str:
+    """
+    Introduce an error that GUARANTEES a different result.
+
+    Strategy: Execute the original query first, then craft an error
+    that produces a definitely-different result.
+    """
+    # First, see what the original query returns. Going through the gold
+    # cache means eval_exec_match reuses this result instead of rerunning it.
+    orig_results, err = execute_gold_query(db_path, sql)
+    if err:
+        # Original query has errors, just make it worse
+        return "SELECT 'BROKEN_QUERY_ERROR'"
+
+    # Choose error strategy based on original results
+    if orig_results and len(orig_results) > 0:
+        # Original has results - use LIMIT 0 to get empty result
+        # But we need to handle queries that already have LIMIT
+        if 'LIMIT' in sql.upper():
+            # Replace existing LIMIT with LIMIT 0
+            return _LIMIT_RE.sub('LIMIT 0', sql)
+        else:
+            return sql + ' LIMIT 0'
+    else:
+        # Original returns empty - make query return something
+        # Use a simple query that always returns a result
+        return "SELECT 'FORCED_DIFFERENT_RESULT' AS col1"
+
+
+def _eval_correct(q: dict) -> bool:
+    """Score a gold query against itself (module level so it pickles for workers)."""
+    return eval_exec_match(q['db_path'], q['gold_sql'], q['gold_sql']).match
+
+
+def _eval_broken(q: dict) -> bool:
+    """Score a deliberately broken copy of a gold query against the original."""
+    broken_sql = introduce_error(q['gold_sql'], q['db_path'])
+    return eval_exec_match(q['db_path'], broken_sql, q['gold_sql']).match
+
+
 def test_50_50_validation(results: TestResults, spider_path: Path):
     """
     Test with 50 correct queries and 50 intentionally broken queries.
@@ -463,14 +577,22 @@ def test_50_50_validation(results: TestResults, spider_path: Path):
         results.record("50/50: Spider data available", False, "Spider data not found in expected locations")
         return
 
-    with open(dev_path) as f:
-        dev_data = json.load(f)
+    dev_data = orjson.loads(dev_path.read_bytes())
 
-    # Find 100 queries with accessible databases
+    # Find 100 queries with accessible databases. One directory scan rules
+    # out missing databases; the file check runs once per database.
+    db_dirs = set()
+    if db_base.is_dir():
+        with os.scandir(db_base) as entries:
+            db_dirs = {e.name for e in entries if e.is_dir()}
+    db_available = {}
     valid_queries = []
     for item in dev_data:
-        db_path = db_base / item['db_id'] / f"{item['db_id']}.sqlite"
-        if db_path.exists():
+        db_id = item['db_id']
+        db_path = db_base / db_id / f"{db_id}.sqlite"
+        if db_id not in db_available:
+            db_available[db_id] = db_id in db_dirs and db_path.exists()
+        if db_available[db_id]:
             valid_queries.append({
                 'db_path': str(db_path),
                 'gold_sql': item['query'],
@@ -494,41 +616,11 @@ def test_50_50_validation(results: TestResults, spider_path: Path):
     correct_queries = valid_queries[:50]
     error_queries = valid_queries[50:100]
 
-    # Introduce errors into the error queries
-    def introduce_error(sql: str, db_path: str) -> str:
-        """
-        Introduce an error that GUARANTEES a different result.
-
-        Strategy: Execute the original query first, then craft an error
-        that produces a definitely-different result.
-        """
-        # First, see what the original query returns
-        orig_results, err = execute_query(db_path, sql)
-        if err:
-            # Original query has errors, just make it worse
-            return "SELECT 'BROKEN_QUERY_ERROR'"
-
-        # Choose error strategy based on original results
-        if orig_results and len(orig_results) > 0:
-            # Original has results - use LIMIT 0 to get empty result
-            # But we need to handle queries that already have LIMIT
-            if 'LIMIT' in sql.upper():
-                # Replace existing LIMIT with LIMIT 0
-                import re
-                return re.sub(r'LIMIT\s+\d+', 'LIMIT 0', sql, flags=re.IGNORECASE)
-            else:
-                return sql + ' LIMIT 0'
-        else:
-            # Original returns empty - make query return something
-            # Use a simple query that always returns a result
-            return "SELECT 'FORCED_DIFFERENT_RESULT' AS col1"
-
-    # Evaluate correct queries (should all match)
-    correct_matches = 0
-    for q in correct_queries:
-        result = eval_exec_match(q['db_path'], q['gold_sql'], q['gold_sql'])
-        if result.match:
-            correct_matches += 1
+    # Queries are independent, so score them across worker processes.
+    # Correct queries should all match; broken ones should all fail.
+    with ProcessPoolExecutor() as pool:
+        correct_matches = sum(pool.map(_eval_correct, correct_queries, chunksize=8))
+        error_matches = sum(pool.map(_eval_broken, error_queries, chunksize=8))
 
     results.record(
         f"50/50: correct queries accuracy ({correct_matches}/50)",
@@ -536,14 +628,6 @@ def test_50_50_validation(results: TestResults, spider_path: Path):
         f"Expected 50, got {correct_matches}"
     )
 
-    # Evaluate error queries (should all fail)
-    error_matches = 0
-    for q in error_queries:
-        broken_sql = introduce_error(q['gold_sql'], q['db_path'])
-        result = eval_exec_match(q['db_path'], broken_sql, q['gold_sql'])
-        if result.match:
-            error_matches += 1
-
     results.record(
         f"50/50: error queries accuracy ({error_matches}/50)",
         error_matches == 0,
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tests for the evaluation harness's persistence:
+- Resuming from the per-question JSONL log
+- The LLM response cache
+- Reattaching to batch jobs
+"""
+
+import json
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+import orjson
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from batch_api import BatchJobManager, run_openai_batch
+from llm_cache import LLMCache
+from llm_providers import LLMResponse, OpenAIProvider
+from run_evaluation import ResultLog, load_existing_results
+from test_evaluation import TestResults
+
+
+# =============================================================================
+# Test 1: Resume Log
+# =============================================================================
+
+def test_resume_log(results: TestResults):
+    """Test resuming from the JSONL log after an interrupted run."""
+    print("\n[Test 1: Resume Log]")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_file = Path(tmp_dir) / 'provider.json'
+        log_file = output_file.with_suffix('.jsonl')
+
+        # A crash mid-write leaves a partial last line
+        log_file.write_bytes(
+            orjson.dumps({'question_id': 1}) + b'\n'
+            + orjson.dumps({'question_id': 2})[:-3]
+        )
+        with ResultLog(log_file) as log:
+            log.append({'question_id': 3})
+
+        existing = load_existing_results(output_file)
+        results.record(
+            "resume: appends after a truncated tail are kept",
+            sorted(existing) == [1, 3],
+            f"Got {sorted(existing)}"
+        )
+
+        # A log that ends cleanly is left as it is
+        with ResultLog(log_file) as log:
+            log.append({'question_id': 4})
+        existing = load_existing_results(output_file)
+        results.record(
+            "resume: complete logs are appended to",
+            sorted(existing) == [1, 3, 4],
+            f"Got {sorted(existing)}"
+        )
+
+
+# =============================================================================
+# Test 2: LLM Cache
+# =============================================================================
+
+def test_llm_cache(results: TestResults):
+    """Test storing and reading back LLM responses."""
+    print("\n[Test 2: LLM Cache]")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = Path(tmp_dir) / 'llm_cache.sqlite'
+        key = LLMCache.make_key('openai/m', 'prompt')
+
+        cache = LLMCache(cache_file)
+        results.record("cache: miss on an empty cache", cache.get(key) is None)
+        cache.put(key, LLMResponse(sql="SELECT 1", raw_response="SELECT 1", model='m', latency_ms=12.5))
+        cache.close()
+
+        # Entries survive reopening the cache file
+        cache = LLMCache(cache_file)
+        cached = cache.get(key)
+        results.record(
+            "cache: get returns what was put",
+            cached is not None and cached.sql == "SELECT 1" and cached.latency_ms == 12.5 and cached.cached,
+            f"Got {cached}"
+        )
+        results.record(
+            "cache: keys depend on the provider",
+            cache.get(LLMCache.make_key('anthropic/m', 'prompt')) is None
+        )
+
+        error_key = LLMCache.make_key('openai/m', 'other prompt')
+        cache.put(error_key, LLMResponse(sql="", raw_response="", model='m', latency_ms=1.0, error="rate limited"))
+        results.record("cache: errors are never cached", cache.get(error_key) is None)
+        cache.close()
+
+
+# =============================================================================
+# Test 3: Batch Job Reattach
+# =============================================================================
+
+class FakeOpenAIBatches:
+    """Just enough of the OpenAI files and batches APIs to run a batch job."""
+
+    def __init__(self):
+        self.created = 0
+        self.interrupt = False
+        self.payload = b''
+
+    def create_file(self, file, purpose):
+        self.payload = file[1]
+        return types.SimpleNamespace(id='file-in')
+
+    def create(self, **kwargs):
+        self.created += 1
+        return types.SimpleNamespace(id=f'batch_{self.created}', status='validating')
+
+    def retrieve(self, job_id):
+        if self.interrupt:
+            raise RuntimeError("interrupted")
+        return types.SimpleNamespace(status='completed', output_file_id='file-out', request_counts=None)
+
+    def content(self, file_id):
+        lines = []
+        for line in self.payload.decode().splitlines():
+            body = {'choices': [{'message': {'content': 'SELECT 1'}}]}
+            lines.append(json.dumps({
+                'custom_id': json.loads(line)['custom_id'],
+                'response': {'status_code': 200, 'body': body}
+            }))
+        return types.SimpleNamespace(text='\n'.join(lines))
+
+
+def test_batch_reattach(results: TestResults):
+    """Test which earlier batch jobs a run reattaches to."""
+    print("\n[Test 3: Batch Job Reattach]")
+
+    fake = FakeOpenAIBatches()
+    provider = OpenAIProvider.__new__(OpenAIProvider)
+    provider.model = 'm'
+    provider.client = types.SimpleNamespace(
+        files=types.SimpleNamespace(create=fake.create_file, content=fake.content),
+        batches=fake
+    )
+    items = [('1', 'schema', 'question one'), ('2', 'schema', 'question two')]
+
+    def run(reattach=True):
+        try:
+            return run_openai_batch(provider, items, manager, poll_interval=0, reattach=reattach)
+        except RuntimeError:
+            return None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = BatchJobManager('openai', Path(tmp_dir))
+
+        # An interrupted run leaves an unfinished job that the next run resumes
+        fake.interrupt = True
+        run()
+        fake.interrupt = False
+        responses = run()
+        results.record(
+            "batch: unfinished job is reattached",
+            fake.created == 1 and responses is not None and responses['1'].sql == "SELECT 1",
+            f"Created {fake.created} jobs"
+        )
+
+        # A finished job is never reused
+        run()
+        results.record("batch: finished job is not reattached", fake.created == 2, f"Created {fake.created} jobs")
+
+        # Without a cache, every run submits a fresh job
+        fake.interrupt = True
+        run()
+        fake.interrupt = False
+        run(reattach=False)
+        results.record(
+            "batch: no reattach when disabled",
+            fake.created == 4,
+            f"Created {fake.created} jobs"
+        )
+
+
+# =============================================================================
+# Main Test Runner
+# =============================================================================
+
+def main():
+    print("=" * 60)
+    print("EVALUATION HARNESS TEST SUITE")
+    print("=" * 60)
+
+    results = TestResults()
+
+    test_resume_log(results)
+    test_llm_cache(results)
+    test_batch_reattach(results)
+
+    all_passed = results.summary()
+
+    return 0 if all_passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,64 +1,115 @@
 #!/usr/bin/env python3
 """
-Validate Malloy semantic layers against Spider questions.
+Validate Malloy semantic layers for the Spider databases.
 
 This script:
-1. Loads Spider questions for each database
-2. Tests that each Malloy layer compiles
-3. Runs basic Malloy queries to verify functionality
-4. Reports validation results
+1. Tests that each Malloy layer compiles
+2. Runs basic Malloy queries to verify functionality
+3. Reports validation results
 """
 
+import argparse
+import hashlib
 import json
 import subprocess
 import os
+import random
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from collections import defaultdict
 import tempfile
 
+import orjson
+
 MALLOY_DIR = Path('/workspace/project/malloy/full')
-SPIDER_DIR = Path('/workspace/spider_db/spider')
+OUTPUT_PATH = Path('/workspace/project/malloy/validation_results.json')
+# One line per database validated this run, appended as each one finishes
+LOG_PATH = OUTPUT_PATH.with_suffix('.ndjson')
+
+# Resolved once instead of searching PATH on every subprocess call
+MALLOY_CLI = shutil.which('malloy-cli')
+
+# Validation mostly waits on malloy-cli subprocesses, so threads overlap well
+MAX_WORKERS = (os.cpu_count() or 1) * 2
+
+# Each malloy-cli is a Node process. Capping its heap, and running no more of
+# them than available memory holds, keeps parallel runs out of swap.
+NODE_HEAP_MB = 384
+MALLOY_ENV = {
+    **os.environ,
+    'NODE_OPTIONS': f"{os.environ.get('NODE_OPTIONS', '')} --max-old-space-size={NODE_HEAP_MB}".strip()
+}
+
+# Passing results keyed by the SHA-256 of the layer file, the databases it
+# scans and the Malloy CLI, so unchanged layers are not re-run. Delete the
+# directory to force a full revalidation.
+CACHE_DIR = Path.home() / '.cache' / 'nl2sql_spider1' / 'malloy_validate'
+# Layer file mtimes (and their databases' stamps) of the layers that passed
+# last run. Machine-local, so kept with the cache rather than in the
+# committed results.
+PASSED_MTIMES_PATH = CACHE_DIR / 'passed_mtimes.json'
+
+
+# Source declarations: "source: name is ...", one per line
+_SOURCE_RE = re.compile(rb'^[ \t]*source:[ \t]+(\S+)', re.MULTILINE)
+
+# Database files a layer reads: sqlite_scan('path', 'table')
+_SQLITE_SCAN_RE = re.compile(rb"sqlite_scan\('([^']+)'")
+
+
+@lru_cache(maxsize=None)
+def malloy_cli_id():
+    """Path and version of the Malloy CLI, so a CLI upgrade invalidates cached passes."""
+    try:
+        result = subprocess.run([MALLOY_CLI, '--version'], capture_output=True, text=True, timeout=30)
+        return f"{MALLOY_CLI} {result.stdout.strip()}"
+    except (OSError, subprocess.TimeoutExpired):
+        return MALLOY_CLI
 
 
-def load_spider_questions():
-    """Load all Spider questions grouped by database."""
-    db_questions = defaultdict(list)
+def _db_stamp(db_path):
+    """[st_mtime_ns, st_size] of a database file, or None if it is missing."""
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
 
-    # Load dev questions
-    with open(SPIDER_DIR / 'dev.json') as f:
-        for q in json.load(f):
-            db_questions[q['db_id']].append({
-                'question': q['question'],
-                'sql': q['query']
-            })
 
-    # Load train questions
-    with open(SPIDER_DIR / 'train_spider.json') as f:
-        for q in json.load(f):
-            db_questions[q['db_id']].append({
-                'question': q['question'],
-                'sql': q['query']
-            })
+def layer_dependencies(layer):
+    """Stamps of the database files a layer's source text scans, keyed by path."""
+    paths = sorted({m.decode() for m in _SQLITE_SCAN_RE.findall(layer)})
+    return {path: _db_stamp(path) for path in paths}
 
-    return db_questions
 
+def layer_fingerprint(malloy_path):
+    """What a layer's validation depends on besides its own text."""
+    layer = malloy_path.read_bytes()
+    return layer, {'deps': layer_dependencies(layer), 'cli': malloy_cli_id()}
 
+
+@lru_cache(maxsize=256)
 def get_source_names_from_malloy(malloy_path):
-    """Extract source names from a Malloy file."""
-    sources = []
-    with open(malloy_path) as f:
-        for line in f:
-            if line.strip().startswith('source:'):
-                # Extract source name: "source: name is ..."
-                parts = line.strip().split()
-                if len(parts) >= 2:
-                    sources.append(parts[1])
-    return sources
-
-
-def run_malloy_query(malloy_path, source_name, query_type='count'):
-    """Run a Malloy query and return success/failure."""
-    # Create a temporary query file
+    """
+    Extract source names from a Malloy file.
+
+    Memoized per path string; returns a tuple so the cached value can't be
+    mutated by callers.
+    """
+    with open(malloy_path, 'rb') as f:
+        data = f.read()
+    return tuple(m.decode() for m in _SOURCE_RE.findall(data))
+
+
+def run_malloy_query(malloy_path, source_name, query_dir, query_type='count'):
+    """
+    Run a Malloy query and return success/failure.
+
+    The query file is written into query_dir, the run's temporary directory,
+    which is removed as a whole once validation finishes.
+    """
     if query_type == 'count':
         query = f"""
 import "{malloy_path}"
@@ -77,33 +128,48 @@ run: {source_name} -> {{
 }}
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.malloy', delete=False) as f:
+    query_path = os.path.join(query_dir, f"{Path(malloy_path).stem}.{source_name}.{query_type}.malloy")
+    with open(query_path, 'w') as f:
         f.write(query)
-        query_path = f.name
 
     try:
         result = subprocess.run(
-            ['malloy-cli', 'run', query_path],
+            [MALLOY_CLI, 'run', query_path],
             capture_output=True,
             text=True,
-            timeout=30
+            timeout=30,
+            env=MALLOY_ENV
         )
-        os.unlink(query_path)
 
         if result.returncode == 0:
             return True, result.stdout
         else:
             return False, result.stderr
     except subprocess.TimeoutExpired:
-        os.unlink(query_path)
         return False, "Query timed out"
     except Exception as e:
-        if os.path.exists(query_path):
-            os.unlink(query_path)
         return False, str(e)
 
 
-def validate_database(db_id, questions, max_tests=10):
+def load_cached_result(cache_file):
+    """Return a cached validation result, or None if there is none."""
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_result(cache_file, result):
+    """Cache a validation result, atomically so concurrent workers never see a partial file."""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(result, f)
+    os.replace(tmp_path, cache_file)
+
+
+def validate_database(db_id, query_dir, use_cache=True):
     """Validate a single database's semantic layer."""
     malloy_path = MALLOY_DIR / f"{db_id}.malloy"
 
@@ -114,8 +180,14 @@ def validate_database(db_id, questions, max_tests=10):
             'tests': []
         }
 
+    layer, fingerprint = layer_fingerprint(malloy_path)
+    cache_file = CACHE_DIR / f"{hashlib.sha256(layer + orjson.dumps(fingerprint)).hexdigest()}.json"
+    cached = load_cached_result(cache_file) if use_cache else None
+    if cached is not None:
+        return cached
+
     # Get source names
-    sources = get_source_names_from_malloy(malloy_path)
+    sources = get_source_names_from_malloy(str(malloy_path))
     if not sources:
         return {
             'status': 'FAIL',
@@ -128,7 +200,7 @@ def validate_database(db_id, questions, max_tests=10):
     all_passed = True
 
     for source in sources:
-        success, output = run_malloy_query(str(malloy_path), source, 'count')
+        success, output = run_malloy_query(str(malloy_path), source, query_dir, 'count')
         test_results.append({
             'source': source,
             'query_type': 'count',
@@ -138,21 +210,70 @@ def validate_database(db_id, questions, max_tests=10):
         if not success:
             all_passed = False
 
-    return {
+    result = {
         'status': 'PASS' if all_passed else 'FAIL',
         'sources_tested': len(sources),
         'tests': test_results
     }
+    # Only passes are cached; failures are rerun until the layer is fixed
+    if all_passed:
+        save_cached_result(cache_file, result)
+    return result
 
 
-def main():
-    print("Loading Spider questions...")
-    db_questions = load_spider_questions()
-    print(f"Found questions for {len(db_questions)} databases")
+def available_memory():
+    """Bytes of memory available for new processes (Linux), or None if unknown."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def worker_count():
+    """Worker threads to use: MAX_WORKERS, lowered to fit one Node heap per worker in memory."""
+    memory = available_memory()
+    if memory is None:
+        return MAX_WORKERS
+    return max(1, min(MAX_WORKERS, memory // (NODE_HEAP_MB * 1024 * 1024)))
 
-    # Get all Malloy files
-    malloy_files = list(MALLOY_DIR.glob('*.malloy'))
-    print(f"Found {len(malloy_files)} Malloy semantic layers")
+
+def load_passed_mtimes():
+    """Layer mtimes and fingerprints recorded for the databases that passed last run."""
+    return load_cached_result(PASSED_MTIMES_PATH) or {}
+
+
+def unchanged_since_pass(passed, mtime):
+    """Whether a layer that passed last run, with its databases and CLI, is untouched."""
+    return (passed is not None
+            and passed['mtime'] == mtime
+            and passed['cli'] == malloy_cli_id()
+            and all(_db_stamp(path) == stamp for path, stamp in passed['deps'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate Malloy semantic layers")
+    parser.add_argument("--force", action="store_true",
+                        help="Revalidate every layer, ignoring the last run and the result cache")
+    parser.add_argument("--inorder", action="store_true",
+                        help="Submit layers in name order instead of shuffled")
+    args = parser.parse_args()
+
+    if MALLOY_CLI is None:
+        print("malloy-cli not found on PATH")
+        return False
+
+    # Get all Malloy files and their mtimes from one directory scan
+    mtimes = {}
+    if MALLOY_DIR.is_dir():
+        with os.scandir(MALLOY_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith('.malloy') and not entry.name.startswith('.') and entry.is_file():
+                    mtimes[entry.name[:-len('.malloy')]] = entry.stat().st_mtime_ns
+    print(f"Found {len(mtimes)} Malloy semantic layers")
 
     results = {
         'passed': [],
@@ -162,22 +283,58 @@ def main():
 
     error_details = []
 
-    for malloy_file in sorted(malloy_files):
-        db_id = malloy_file.stem
-        questions = db_questions.get(db_id, [])
+    db_ids = sorted(mtimes)
+    outcomes = {}
 
-        print(f"  Testing {db_id}...", end=' ')
-        result = validate_database(db_id, questions)
+    # Layers that passed last run and haven't been touched since are not rerun
+    passed_mtimes = {} if args.force else load_passed_mtimes()
+    to_validate = []
+    for db_id in db_ids:
+        if unchanged_since_pass(passed_mtimes.get(db_id), mtimes[db_id]):
+            outcomes[db_id] = {'status': 'PASS', 'tests': []}
+        else:
+            to_validate.append(db_id)
+    if len(to_validate) < len(db_ids):
+        print(f"Skipping {len(db_ids) - len(to_validate)} unchanged layers that passed last run")
+
+    # Shuffle so slow layers with similar names don't all land at the end of
+    # the queue; saved results are collected by name either way
+    if not args.inorder:
+        random.shuffle(to_validate)
+
+    # Databases are independent; report and log each one as soon as it
+    # finishes, so an interrupted run still leaves what it got through.
+    # All query files go in one temp dir, cleaned up in one go at the end.
+    with tempfile.TemporaryDirectory(prefix='malloy_queries_') as query_dir, \
+            open(LOG_PATH, 'wb') as log, \
+            ThreadPoolExecutor(max_workers=worker_count()) as pool:
+        futures = {
+            pool.submit(validate_database, db_id, query_dir, not args.force): db_id
+            for db_id in to_validate
+        }
+        for future in as_completed(futures):
+            db_id = futures[future]
+            result = outcomes[db_id] = future.result()
+            log.write(orjson.dumps({'db_id': db_id, **result}) + b'\n')
+            log.flush()
+
+            if result['status'] == 'PASS':
+                print(f"  {db_id}: PASS ({result['sources_tested']} sources)", flush=True)
+            elif result['status'] == 'SKIP':
+                print(f"  {db_id}: SKIP - {result['reason']}", flush=True)
+            else:
+                print(f"  {db_id}: FAIL", flush=True)
+
+    # Collect in name order so the saved results don't depend on timing
+    for db_id in db_ids:
+        result = outcomes[db_id]
 
         if result['status'] == 'PASS':
             results['passed'].append(db_id)
-            print(f"PASS ({result['sources_tested']} sources)")
         elif result['status'] == 'SKIP':
             results['skipped'].append(db_id)
-            print(f"SKIP - {result['reason']}")
         else:
             results['failed'].append(db_id)
-            print(f"FAIL")
             # Collect error details
             for test in result['tests']:
                 if not test['passed']:
@@ -201,19 +358,22 @@ def main():
             print(f"  ... and {len(results['failed']) - 10} more")
 
     # Save detailed results
-    output_path = Path('/workspace/project/malloy/validation_results.json')
-    with open(output_path, 'w') as f:
-        json.dump({
-            'summary': {
-                'passed': len(results['passed']),
-                'failed': len(results['failed']),
-                'skipped': len(results['skipped'])
-            },
-            'results': results,
-            'errors': error_details[:50]  # First 50 errors
-        }, f, indent=2)
-
-    print(f"\nDetailed results saved to: {output_path}")
+    OUTPUT_PATH.write_bytes(orjson.dumps({
+        'summary': {
+            'passed': len(results['passed']),
+            'failed': len(results['failed']),
+            'skipped': len(results['skipped'])
+        },
+        'results': results,
+        'errors': error_details[:50]  # First 50 errors
+    }, option=orjson.OPT_INDENT_2))
+    # Lets the next run skip layers that passed and haven't changed
+    save_cached_result(PASSED_MTIMES_PATH, {
+        db_id: {'mtime': mtimes[db_id], **layer_fingerprint(MALLOY_DIR / f"{db_id}.malloy")[1]}
+        for db_id in results['passed']
+    })
+
+    print(f"\nDetailed results saved to: {OUTPUT_PATH}")
 
     return len(results['failed']) == 0
 